@@ -1,52 +1,79 @@
-# --- ROBUST MONKEYPATCH FOR BCRYPT/PASSLIB COMPATIBILITY ---
-import bcrypt
 import functools
-
-# 1. Mock __about__ for passlib version check
-if not hasattr(bcrypt, "__about__"):
-    class About:
-        __version__ = getattr(bcrypt, "__version__", "4.0.1")
-    bcrypt.__about__ = About()
-
-# 2. Wrap hashpw to truncate passwords to 72 bytes (prevents ValueError)
-original_hashpw = bcrypt.hashpw
-@functools.wraps(original_hashpw)
-def patched_hashpw(password, salt):
-    if isinstance(password, str):
-        password = password.encode('utf-8')
-    # passlib's test password is > 72 bytes, bcrypt 4.0+ raises ValueError
-    if len(password) > 72:
-        password = password[:72]
-    return original_hashpw(password, salt)
-
-bcrypt.hashpw = patched_hashpw
-# -----------------------------------------------------------
-
 import os
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from backend.database import get_session
 from backend.models import User
+from backend.services.hashing import run_hash_job
+from backend.services.worker_bus import bus
+from backend.utils.cache import TTLCache
 
 # Secret key settings (SHOULD BE IN ENV VARS FOR PRODUCTION)
 SECRET_KEY = "supersecretkey" 
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+
+# Verified token subject (email) -> column snapshot of the User row
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", 10000))
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# Built on the first hash or verify, so workers that never see a password don't load passlib
+_pwd_context: Optional["CryptContext"] = None
+
+def _patch_bcrypt():
+    # passlib 1.7 predates bcrypt 4: it reads bcrypt.__about__ and probes with a
+    # password over 72 bytes, which bcrypt 4.0+ rejects. Applied once per process.
+    import bcrypt
+    if getattr(bcrypt, "_kaziflow_patched", False):
+        return
+    if not hasattr(bcrypt, "__about__"):
+        class About:
+            __version__ = getattr(bcrypt, "__version__", "4.0.1")
+        bcrypt.__about__ = About()
+
+    original_hashpw = bcrypt.hashpw
+    @functools.wraps(original_hashpw)
+    def patched_hashpw(password, salt):
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        if len(password) > 72:
+            password = password[:72]
+        return original_hashpw(password, salt)
+
+    bcrypt.hashpw = patched_hashpw
+    bcrypt._kaziflow_patched = True
+
+def get_pwd_context() -> "CryptContext":
+    global _pwd_context
+    if _pwd_context is None:
+        _patch_bcrypt()
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await run_hash_job("verify", verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await run_hash_job("hash", get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -58,6 +85,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_access_token(user: User) -> str:
+    return create_access_token(
+        data={"sub": user.email, "role": user.role.value},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+
 async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,9 +105,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSe
     except JWTError:
         raise credentials_exception
     
-    statement = select(User).where(User.email == email)
-    result = await session.exec(statement)
-    user = result.first()
-    if user is None:
-        raise credentials_exception
+    snapshot = user_cache.get(email)
+    if snapshot is None:
+        statement = select(User).where(User.email == email)
+        result = await session.exec(statement)
+        user = result.first()
+        if user is None:
+            raise credentials_exception
+        snapshot = user.model_dump()
+        user_cache.set(email, snapshot)
+
+    # Each request gets its own instance; it behaves like a detached, already
+    # loaded row so handlers can still session.add() it to persist changes.
+    user = User(**snapshot)
+    make_transient_to_detached(user)
     return user
+
+def _invalidate_users(emails: List[str]):
+    for email in emails:
+        user_cache.invalidate(email)
+
+bus.subscribe("user", _invalidate_users, on_reset=user_cache.clear)
+
+def invalidate_cached_user(email: str):
+    """
+    Drops a user's cached row on every worker. Call after committing the change.
+    """
+    bus.publish("user", [email])
@@ -0,0 +1,19 @@
+import time
+
+# Process state for the health endpoints and graceful shutdown
+started_at = time.time()
+draining = False
+
+def begin_drain():
+    """
+    Marks this worker as going away: readiness starts failing so the load
+    balancer stops sending new requests, and open notification streams are
+    closed so their clients reconnect elsewhere. In-flight requests finish.
+    Safe to call again, e.g. to close streams opened since.
+    """
+    global draining
+    if not draining:
+        print("Draining: no longer ready for new requests")
+    draining = True
+    from backend.services.notification_broker import broker
+    broker.close_all()
@@ -1,36 +1,69 @@
-# --- ROBUST MONKEYPATCH FOR BCRYPT/PASSLIB COMPATIBILITY ---
-import bcrypt
-import functools
-
-if not hasattr(bcrypt, "__about__"):
-    class About:
-        __version__ = getattr(bcrypt, "__version__", "4.0.1")
-    bcrypt.__about__ = About()
-
-original_hashpw = bcrypt.hashpw
-@functools.wraps(original_hashpw)
-def patched_hashpw(password, salt):
-    if isinstance(password, str):
-        password = password.encode('utf-8')
-    if len(password) > 72:
-        password = password[:72]
-    return original_hashpw(password, salt)
-
-bcrypt.hashpw = patched_hashpw
-print("Applied robust bcrypt monkeypatch in main.py")
-# -----------------------------------------------------------
-
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
-from backend.database import init_db
+from backend.database import WEB_CONCURRENCY, close_db, engine, init_db
+from backend.middleware import AdmissionMiddleware, AdmissionRule, MetricsMiddleware
+from backend.utils.metrics import render_metrics
+from backend.utils.responses import FastJSONResponse
+from backend.services.hashing import shutdown_hash_pool
+from backend.services.risk_jobs import shutdown_risk_workers
+from backend.services.worker_bus import bus, transport_for
+
+# bcrypt routes: every call costs a hash worker, even with a wrong password. Sized for
+# offices and branches sharing one NAT address; logins are limited per username and IP,
+# so one account's guesses don't lock out the colleagues behind the same address
+AUTH_LOGIN_RATE_PER_MINUTE = float(os.environ.get("AUTH_LOGIN_RATE_PER_MINUTE", 10))
+AUTH_LOGIN_BURST = int(os.environ.get("AUTH_LOGIN_BURST", 10))
+AUTH_REGISTER_RATE_PER_MINUTE = float(os.environ.get("AUTH_REGISTER_RATE_PER_MINUTE", 60))
+AUTH_REGISTER_BURST = int(os.environ.get("AUTH_REGISTER_BURST", 30))
+AUTH_CHANGE_PASSWORD_RATE_PER_MINUTE = float(os.environ.get("AUTH_CHANGE_PASSWORD_RATE_PER_MINUTE", 10))
+AUTH_CHANGE_PASSWORD_BURST = int(os.environ.get("AUTH_CHANGE_PASSWORD_BURST", 5))
+# Per route and worker
+AUTH_CONCURRENCY = int(os.environ.get("AUTH_CONCURRENCY", 16))
+# Synchronous model calls, per user; batch scoring goes through /risk/analyze-batch instead
+RISK_ANALYZE_RATE_PER_MINUTE = float(os.environ.get("RISK_ANALYZE_RATE_PER_MINUTE", 6))
+RISK_ANALYZE_BURST = int(os.environ.get("RISK_ANALYZE_BURST", 3))
+RISK_ANALYZE_CONCURRENCY = int(os.environ.get("RISK_ANALYZE_CONCURRENCY", 4))
+# Every other route, per user or IP; 0 leaves them unlimited
+API_RATE_PER_MINUTE = float(os.environ.get("API_RATE_PER_MINUTE", 0))
+API_BURST = int(os.environ.get("API_BURST", 60))
+
+admission_rules = [
+    AdmissionRule(
+        "auth_login", ("POST /auth/token",),
+        rate_per_minute=AUTH_LOGIN_RATE_PER_MINUTE, burst=AUTH_LOGIN_BURST, concurrency=AUTH_CONCURRENCY, key="username+ip",
+    ),
+    AdmissionRule(
+        "auth_register", ("POST /auth/register",),
+        rate_per_minute=AUTH_REGISTER_RATE_PER_MINUTE, burst=AUTH_REGISTER_BURST, concurrency=AUTH_CONCURRENCY, key="ip",
+    ),
+    AdmissionRule(
+        "auth_change_password", ("POST /auth/change-password",),
+        rate_per_minute=AUTH_CHANGE_PASSWORD_RATE_PER_MINUTE, burst=AUTH_CHANGE_PASSWORD_BURST,
+        concurrency=AUTH_CONCURRENCY, key="principal+ip",
+    ),
+    AdmissionRule(
+        "risk_analyze", ("POST /risk/analyze/{vendor_id}",),
+        rate_per_minute=RISK_ANALYZE_RATE_PER_MINUTE, burst=RISK_ANALYZE_BURST, concurrency=RISK_ANALYZE_CONCURRENCY,
+    ),
+    # Load balancer probes, unlimited so a busy API never looks like a dead worker
+    AdmissionRule("probes", ("GET /system/health", "GET /system/ready")),
+    AdmissionRule("api", ("*",), rate_per_minute=API_RATE_PER_MINUTE, burst=API_BURST),
+]
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await bus.start(transport_for(engine.url, WEB_CONCURRENCY))
     yield
+    await bus.stop()
+    await shutdown_risk_workers()
+    shutdown_hash_pool()
+    await close_db()
 
-app = FastAPI(lifespan=lifespan, title="KaziFlow API", version="1.0.0")
+app = FastAPI(lifespan=lifespan, title="KaziFlow API", version="1.0.0", default_response_class=FastJSONResponse)
 
 origins = [
     "http://localhost:3000",
@@ -39,6 +72,8 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
+# Inside CORS, so browsers can read the 429/503 and its Retry-After
+app.add_middleware(AdmissionMiddleware, routes=app.router.routes, rules=admission_rules)
 # Permissive CORS for development
 app.add_middleware(
     CORSMiddleware,
@@ -46,16 +81,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After", "ETag"],
 )
+# Added last so it wraps CORS and sees every request
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
 
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to KaziFlow API"}
 
-from backend.routers import auth, risk, invoices, notifications
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+from backend.routers import auth, risk, invoices, notifications, system
 
 app.include_router(auth.router)
 app.include_router(risk.router)
 app.include_router(invoices.router)
 app.include_router(notifications.router)
+app.include_router(system.router)
 
@@ -0,0 +1,248 @@
+import math
+import os
+import time
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qs
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from backend.auth import ALGORITHM, SECRET_KEY
+from backend.database import query_counter
+from backend.utils.metrics import Counter, Gauge, Histogram, register_collector
+from backend.utils.rate_limit import TokenBucketLimiter
+
+# Master switch, e.g. for load tests that measure raw capacity
+ADMISSION_CONTROL = os.environ.get("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+# Retry-After sent when a route is at its concurrency cap
+ADMISSION_BUSY_RETRY_SECONDS = int(os.environ.get("ADMISSION_BUSY_RETRY_SECONDS", 1))
+# Bodies read to find the username of "username+ip" rules; login forms are far smaller
+ADMISSION_BODY_LIMIT = 4096
+
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route", ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled", ("method", "route"))
+HTTP_QUERIES = Histogram(
+    "http_request_queries", "SQL statements executed per request", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+
+def route_template(routes, scope) -> str:
+    # Templated path ("/invoices/{invoice_id}/qr") keeps label cardinality bounded
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, in-flight requests and
+    the number of SQL statements each request issued.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(self.routes, scope)
+        # Reused by AdmissionMiddleware further down the stack
+        scope["route_template"] = route
+        status = {"code": 500}
+        counter = [0]
+        token = query_counter.set(counter)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method, route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(method, route)
+            query_counter.reset(token)
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route, str(status["code"]))
+            HTTP_QUERIES.observe(counter[0], method, route)
+
+ADMISSION_REJECTED = Counter(
+    "http_admission_rejected_total", "Requests turned away by admission control", ("rule", "reason"),
+)
+
+_admission_rules: List["AdmissionRule"] = []
+
+class AdmissionRule:
+    """
+    Limits for a group of routes, given as "METHOD /templated/path" or "*"
+    for every route without a rule of its own. `rate_per_minute` and `burst`
+    size a token bucket per caller (0 disables it). `key` picks the caller:
+    "principal" (the token's subject, or the client IP when anonymous),
+    "ip", "principal+ip", or "username+ip" (the `username` form field, for
+    logins). `concurrency` caps this worker's requests in flight across all
+    callers (0 for no cap).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        routes: Iterable[str],
+        rate_per_minute: float = 0,
+        burst: int = 1,
+        concurrency: int = 0,
+        key: str = "principal",
+    ):
+        self.name = name
+        self.routes = tuple(routes)
+        self.key = key
+        self.limiter = TokenBucketLimiter(rate_per_minute / 60, burst) if rate_per_minute > 0 else None
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.busy_rejected = 0
+        _admission_rules.append(self)
+
+    def stats(self) -> dict:
+        return {
+            "routes": list(self.routes),
+            "key": self.key,
+            "rate": self.limiter.stats() if self.limiter is not None else None,
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "busy_rejected": self.busy_rejected,
+        }
+
+def admission_stats() -> dict:
+    return {"enabled": ADMISSION_CONTROL, "rules": {rule.name: rule.stats() for rule in _admission_rules}}
+
+def _admission_metrics():
+    for rule in _admission_rules:
+        if rule.concurrency:
+            yield "http_admission_in_flight", "gauge", "Requests in flight under a concurrency-capped rule", {"rule": rule.name}, rule.in_flight
+
+register_collector(_admission_metrics)
+
+def _token_subject(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                # Verified, so a forged subject can't spread one client over many buckets
+                return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            except JWTError:
+                return None
+    return None
+
+def _client_ip(scope) -> str:
+    # The peer address; run uvicorn with --proxy-headers behind a trusted proxy
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+def _caller(scope, rule: AdmissionRule, username: Optional[str] = None) -> str:
+    if rule.key == "ip":
+        return _client_ip(scope)
+    if rule.key == "username+ip":
+        return f"user:{username or ''}|{_client_ip(scope)}"
+    subject = _token_subject(scope)
+    if rule.key == "principal+ip":
+        return f"sub:{subject or ''}|{_client_ip(scope)}"
+    return subject or _client_ip(scope)
+
+async def _read_body(receive) -> list:
+    """
+    Receives the request body, up to ADMISSION_BODY_LIMIT, as the ASGI
+    messages it arrived in, so they can be replayed to the route.
+    """
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body") or size > ADMISSION_BODY_LIMIT:
+            break
+    return messages
+
+def _replay(messages: list, receive):
+    async def replay():
+        return messages.pop(0) if messages else await receive()
+    return replay
+
+def _form_username(messages: list) -> str:
+    body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.request")
+    usernames = parse_qs(body[:ADMISSION_BODY_LIMIT].decode("utf-8", "replace")).get("username")
+    # Emails: one bucket however the address is capitalised
+    return usernames[0].strip().lower() if usernames else ""
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying AdmissionRules before a request reaches
+    its route. A full concurrency cap answers 503, an empty token bucket
+    429, both with Retry-After and without touching the database.
+    """
+
+    def __init__(self, app, routes, rules: Iterable[AdmissionRule]):
+        self.app = app
+        self.routes = routes
+        self.rules = {}
+        self.fallback = None
+        for rule in rules:
+            for route in rule.routes:
+                if route == "*":
+                    self.fallback = rule
+                else:
+                    self.rules[route] = rule
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+
+        route = scope.get("route_template") or route_template(self.routes, scope)
+        rule = self.rules.get(f"{scope['method']} {route}", self.fallback)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Checked first, so a request turned away as busy doesn't also spend a token
+        if rule.concurrency and rule.in_flight >= rule.concurrency:
+            rule.busy_rejected += 1
+            ADMISSION_REJECTED.inc(rule.name, "concurrency")
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_BUSY_RETRY_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        if rule.limiter is not None:
+            username = None
+            if rule.key == "username+ip":
+                messages = await _read_body(receive)
+                username = _form_username(messages)
+                receive = _replay(messages, receive)
+            wait = rule.limiter.acquire(_caller(scope, rule, username))
+            if wait:
+                ADMISSION_REJECTED.inc(rule.name, "rate")
+                response = JSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                )
+                await response(scope, receive, send)
+                return
+
+        rule.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            rule.in_flight -= 1
@@ -0,0 +1,71 @@
+"""
+Versioned schema migrations.
+
+Each module in MIGRATIONS defines VERSION, DESCRIPTION and a synchronous
+upgrade(connection). They are applied in order, each in its own transaction,
+and recorded in the schema_version table. Worker startup only reads that
+table (see verify_schema); run `python -m backend.migrations upgrade` to
+bring a database up to date.
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from backend.migrations import m0001_initial, m0002_vendor_stats, m0003_query_indexes, m0004_refresh_tokens, m0005_notification_counters, m0006_invoice_version, m0007_invoice_search, m0008_change_versions, m0009_risk_jobs
+
+MIGRATIONS = [m0001_initial, m0002_vendor_stats, m0003_query_indexes, m0004_refresh_tokens, m0005_notification_counters, m0006_invoice_version, m0007_invoice_search, m0008_change_versions, m0009_risk_jobs]
+LATEST_VERSION = MIGRATIONS[-1].VERSION
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+def _current_version(connection) -> int:
+    if not inspect(connection).has_table("schema_version"):
+        return 0
+    return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+async def current_version(engine: AsyncEngine) -> int:
+    async with engine.connect() as conn:
+        return await conn.run_sync(_current_version)
+
+async def upgrade(engine: AsyncEngine, target: int = LATEST_VERSION) -> list:
+    """
+    Applies every pending migration up to `target`; returns the versions applied.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: _metadata.create_all(sync_conn, checkfirst=True))
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.VERSION > target:
+            break
+        async with engine.begin() as conn:
+            if await conn.run_sync(_current_version) >= migration.VERSION:
+                continue
+            await conn.run_sync(migration.upgrade)
+            await conn.execute(schema_version.insert().values(
+                version=migration.VERSION,
+                description=migration.DESCRIPTION,
+                applied_at=datetime.utcnow(),
+            ))
+        applied.append(migration.VERSION)
+    return applied
+
+async def verify_schema(engine: AsyncEngine):
+    """
+    Cheap startup check: one indexed read instead of reflecting every table.
+    """
+    version = await current_version(engine)
+    if version != LATEST_VERSION:
+        raise SchemaOutOfDateError(
+            f"Database schema is at version {version}, code expects {LATEST_VERSION}. "
+            "Run `python -m backend.migrations upgrade`."
+        )
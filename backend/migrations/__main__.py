@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+from backend.database import engine
+from backend.migrations import LATEST_VERSION, current_version, upgrade
+import backend.models  # noqa: F401 - registers the tables on SQLModel.metadata
+
+def schema_drift(connection) -> list:
+    """
+    Differences between the migrated database and the SQLModel table definitions.
+    """
+    inspector = inspect(connection)
+    problems = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            problems.append(f"missing table {table.name}")
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        expected = {column.name for column in table.columns}
+        problems += [f"missing column {table.name}.{name}" for name in sorted(expected - columns)]
+        problems += [f"unexpected column {table.name}.{name}" for name in sorted(columns - expected)]
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        problems += [f"missing index {index.name}" for index in table.indexes if index.name not in indexes]
+    return problems
+
+async def main():
+    parser = argparse.ArgumentParser(description="Manage the KaziFlow database schema.")
+    parser.add_argument(
+        "command", choices=["upgrade", "current", "check"],
+        help="upgrade: apply pending migrations; current: print the schema version; "
+             "check: upgrade, then verify the result matches the models",
+    )
+    args = parser.parse_args()
+
+    if args.command == "current":
+        print(f"Schema version {await current_version(engine)} (latest {LATEST_VERSION})")
+        return
+
+    applied = await upgrade(engine)
+    print(f"Applied migrations: {applied or 'none'}; schema at version {LATEST_VERSION}")
+
+    if args.command == "check":
+        async with engine.connect() as conn:
+            problems = await conn.run_sync(schema_drift)
+        for problem in problems:
+            print(f"  {problem}")
+        if problems:
+            raise SystemExit(f"Schema check failed on {engine.dialect.name}")
+        print(f"Schema matches the models on {engine.dialect.name}")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
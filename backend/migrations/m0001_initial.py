@@ -0,0 +1,61 @@
+"""
+Baseline: the tables as originally created by SQLModel.metadata.create_all.
+Frozen here so later model changes don't alter what this migration builds.
+Uses checkfirst, so databases created before migrations existed are adopted as-is.
+"""
+from sqlalchemy import JSON, Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, MetaData, String, Table, Uuid
+
+VERSION = 1
+DESCRIPTION = "initial schema"
+
+metadata = MetaData()
+
+user = Table(
+    "user", metadata,
+    Column("email", String, nullable=False),
+    Column("full_name", String, nullable=False),
+    Column("role", Enum("VENDOR", "RETAILER", "BANK", "ADMIN", name="userrole"), nullable=False),
+    Column("company_name", String),
+    Column("id", Uuid, primary_key=True),
+    Column("hashed_password", String, nullable=False),
+    Index("ix_user_email", "email", unique=True),
+)
+
+invoice = Table(
+    "invoice", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("amount", Float, nullable=False),
+    Column("description", String, nullable=False),
+    Column("status", Enum("PENDING", "APPROVED", "REJECTED", "PAID", "FINANCED", name="invoicestatus"), nullable=False),
+    Column("due_date", DateTime, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("vendor_id", Uuid, ForeignKey("user.id"), nullable=False),
+    Column("retailer_id", Uuid, ForeignKey("user.id")),
+    Column("qr_code", String),
+    Column("is_verified", Boolean, nullable=False),
+    Column("ai_risk_score", Integer),
+)
+
+riskassessment = Table(
+    "riskassessment", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("score", Integer, nullable=False),
+    Column("level", String, nullable=False),
+    Column("reasoning", String, nullable=False),
+    Column("factors", JSON, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("vendor_id", Uuid, ForeignKey("user.id"), nullable=False),
+)
+
+notification = Table(
+    "notification", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("user_id", Uuid, ForeignKey("user.id"), nullable=False),
+    Column("title", String, nullable=False),
+    Column("message", String, nullable=False),
+    Column("is_read", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,38 @@
+"""
+Per-vendor statistics table and Invoice.paid_at; QR codes are no longer stored.
+"""
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, MetaData, Table, Uuid, inspect, text
+
+VERSION = 2
+DESCRIPTION = "vendor stats, invoice paid_at, drop invoice qr_code"
+
+metadata = MetaData()
+
+# Only referenced for the foreign key; the table itself comes from migration 0001
+Table("user", metadata, Column("id", Uuid, primary_key=True))
+
+vendorstats = Table(
+    "vendorstats", metadata,
+    Column("vendor_id", Uuid, ForeignKey("user.id"), primary_key=True),
+    Column("invoice_count", Integer, nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("status_counts", JSON, nullable=False),
+    Column("status_amounts", JSON, nullable=False),
+    Column("paid_late_count", Integer, nullable=False),
+    Column("paid_days_total", Float, nullable=False),
+    Column("paid_days_count", Integer, nullable=False),
+    Column("daily_volume", JSON, nullable=False),
+    Column("first_invoice_at", DateTime),
+    Column("last_invoice_at", DateTime),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+def upgrade(connection):
+    # Databases created by create_all after these model changes already have them
+    columns = {column["name"] for column in inspect(connection).get_columns("invoice")}
+    timestamp = "TIMESTAMP WITHOUT TIME ZONE" if connection.dialect.name == "postgresql" else "DATETIME"
+    if "paid_at" not in columns:
+        connection.execute(text(f"ALTER TABLE invoice ADD COLUMN paid_at {timestamp}"))
+    if "qr_code" in columns:
+        connection.execute(text("ALTER TABLE invoice DROP COLUMN qr_code"))
+    vendorstats.create(connection, checkfirst=True)
@@ -0,0 +1,27 @@
+"""
+Composite indexes matched to the hot queries:
+- invoice listing: keyset on (created_at, id), optionally scoped to a vendor or retailer
+- invoice filters: status with due-date ranges, and due-date ranges alone
+- notification polling/streaming: a user's rows by (created_at, id), plus unread rows
+- risk history: a vendor's assessments by created_at
+"""
+from sqlalchemy import text
+
+VERSION = 3
+DESCRIPTION = "query-driven indexes"
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_invoice_created_at_id ON invoice (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_invoice_vendor_created_at ON invoice (vendor_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_invoice_retailer_created_at ON invoice (retailer_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_invoice_status_due_date ON invoice (status, due_date)",
+    "CREATE INDEX IF NOT EXISTS ix_invoice_due_date ON invoice (due_date)",
+    "CREATE INDEX IF NOT EXISTS ix_notification_user_created_at ON notification (user_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_riskassessment_vendor_created_at ON riskassessment (vendor_id, created_at)",
+]
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.execute(text(statement))
+    unread = "NOT is_read" if connection.dialect.name == "postgresql" else "is_read = 0"
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_notification_user_unread ON notification (user_id) WHERE {unread}"))
@@ -0,0 +1,30 @@
+"""
+Refresh tokens: only a SHA-256 of each opaque token is stored, behind a unique
+index, so refreshing and revoking are single indexed lookups.
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, MetaData, String, Table, Uuid
+
+VERSION = 4
+DESCRIPTION = "refresh tokens"
+
+metadata = MetaData()
+
+# Only referenced for the foreign key; the table itself comes from migration 0001
+Table("user", metadata, Column("id", Uuid, primary_key=True))
+
+refreshtoken = Table(
+    "refreshtoken", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("token_hash", String, nullable=False),
+    Column("user_id", Uuid, ForeignKey("user.id"), nullable=False),
+    Column("family_id", Uuid, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("revoked_at", DateTime),
+    Index("ix_refreshtoken_token_hash", "token_hash", unique=True),
+    Index("ix_refreshtoken_user_id", "user_id"),
+    Index("ix_refreshtoken_family_id", "family_id"),
+)
+
+def upgrade(connection):
+    refreshtoken.create(connection, checkfirst=True)
@@ -0,0 +1,29 @@
+"""
+Per-user unread notification counters, so the unread badge is a primary-key
+read instead of a count over the user's notifications. Backfilled from the
+existing rows.
+"""
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, Table, Uuid, text
+
+VERSION = 5
+DESCRIPTION = "notification unread counters"
+
+metadata = MetaData()
+
+# Only referenced for the foreign key; the table itself comes from migration 0001
+Table("user", metadata, Column("id", Uuid, primary_key=True))
+
+notificationcounter = Table(
+    "notificationcounter", metadata,
+    Column("user_id", Uuid, ForeignKey("user.id"), primary_key=True),
+    Column("unread", Integer, nullable=False),
+)
+
+def upgrade(connection):
+    notificationcounter.create(connection, checkfirst=True)
+    unread = "NOT is_read" if connection.dialect.name == "postgresql" else "is_read = 0"
+    connection.execute(text("DELETE FROM notificationcounter"))
+    connection.execute(text(
+        "INSERT INTO notificationcounter (user_id, unread) "
+        f"SELECT user_id, COUNT(*) FROM notification WHERE {unread} GROUP BY user_id"
+    ))
@@ -0,0 +1,14 @@
+"""
+Invoice.version, the optimistic-concurrency counter checked and bumped by
+status transitions.
+"""
+from sqlalchemy import inspect, text
+
+VERSION = 6
+DESCRIPTION = "invoice version"
+
+def upgrade(connection):
+    # Databases created by create_all after this model change already have it
+    columns = {column["name"] for column in inspect(connection).get_columns("invoice")}
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE invoice ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
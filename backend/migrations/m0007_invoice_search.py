@@ -0,0 +1,101 @@
+"""
+Full-text search over invoice descriptions and vendor company names.
+
+Postgres: invoice_search holds a weighted tsvector per invoice (description A,
+company name B) behind a GIN index. SQLite: an FTS5 table keyed by the
+invoice rowid. Either is maintained by triggers on invoice inserts,
+description/vendor updates and deletes and on vendor renames, then backfilled.
+"""
+from sqlalchemy import text
+
+VERSION = 7
+DESCRIPTION = "invoice full-text search"
+
+ACCENTED = "àáâãäåçèéêëìíîïñòóôõöùúûüýÿ"
+UNACCENTED = "aaaaaaceeeeiiiinooooouuuuyy"
+
+POSTGRES = [
+    """CREATE TABLE IF NOT EXISTS invoice_search (
+        invoice_id UUID PRIMARY KEY REFERENCES invoice (id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_invoice_search_document ON invoice_search USING GIN (document)",
+    # Accents folded with translate() rather than the unaccent extension, which isn't always installed
+    f"""CREATE OR REPLACE FUNCTION invoice_search_fold(value TEXT) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT translate(lower(coalesce(value, '')), '{ACCENTED}', '{UNACCENTED}')
+    $$""",
+    # 'simple': descriptions mix English, French and Kinyarwanda, so no stemming
+    """CREATE OR REPLACE FUNCTION invoice_search_document(description TEXT, company_name TEXT) RETURNS TSVECTOR
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT setweight(to_tsvector('simple', invoice_search_fold(description)), 'A')
+            || setweight(to_tsvector('simple', invoice_search_fold(company_name)), 'B')
+    $$""",
+    # Statement-level, so a multi-row INSERT is indexed with one INSERT ... SELECT
+    """CREATE OR REPLACE FUNCTION invoice_search_insert() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO invoice_search (invoice_id, document)
+        SELECT i.id, invoice_search_document(i.description, u.company_name)
+        FROM inserted i LEFT JOIN "user" u ON u.id = i.vendor_id;
+        RETURN NULL;
+    END $$""",
+    """CREATE OR REPLACE FUNCTION invoice_search_update() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE invoice_search
+        SET document = invoice_search_document(NEW.description, (SELECT company_name FROM "user" WHERE id = NEW.vendor_id))
+        WHERE invoice_id = NEW.id;
+        RETURN NULL;
+    END $$""",
+    """CREATE OR REPLACE FUNCTION invoice_search_vendor_rename() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE invoice_search s
+        SET document = invoice_search_document(i.description, NEW.company_name)
+        FROM invoice i
+        WHERE i.id = s.invoice_id AND i.vendor_id = NEW.id;
+        RETURN NULL;
+    END $$""",
+    "DROP TRIGGER IF EXISTS invoice_search_insert ON invoice",
+    """CREATE TRIGGER invoice_search_insert AFTER INSERT ON invoice
+    REFERENCING NEW TABLE AS inserted FOR EACH STATEMENT EXECUTE FUNCTION invoice_search_insert()""",
+    # Status transitions don't touch these columns, so they don't fire it
+    "DROP TRIGGER IF EXISTS invoice_search_update ON invoice",
+    """CREATE TRIGGER invoice_search_update AFTER UPDATE OF description, vendor_id ON invoice
+    FOR EACH ROW EXECUTE FUNCTION invoice_search_update()""",
+    'DROP TRIGGER IF EXISTS invoice_search_vendor_rename ON "user"',
+    """CREATE TRIGGER invoice_search_vendor_rename AFTER UPDATE OF company_name ON "user"
+    FOR EACH ROW WHEN (OLD.company_name IS DISTINCT FROM NEW.company_name)
+    EXECUTE FUNCTION invoice_search_vendor_rename()""",
+    """INSERT INTO invoice_search (invoice_id, document)
+    SELECT i.id, invoice_search_document(i.description, u.company_name)
+    FROM invoice i LEFT JOIN "user" u ON u.id = i.vendor_id
+    ON CONFLICT (invoice_id) DO NOTHING""",
+]
+
+SQLITE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS invoice_fts
+    USING fts5(description, company_name, tokenize = 'unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS invoice_fts_insert AFTER INSERT ON invoice BEGIN
+        INSERT INTO invoice_fts (rowid, description, company_name)
+        VALUES (new.rowid, new.description, (SELECT company_name FROM "user" WHERE id = new.vendor_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS invoice_fts_update AFTER UPDATE OF description, vendor_id ON invoice BEGIN
+        UPDATE invoice_fts
+        SET description = new.description, company_name = (SELECT company_name FROM "user" WHERE id = new.vendor_id)
+        WHERE rowid = new.rowid;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS invoice_fts_delete AFTER DELETE ON invoice BEGIN
+        DELETE FROM invoice_fts WHERE rowid = old.rowid;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS invoice_fts_vendor_rename AFTER UPDATE OF company_name ON "user" BEGIN
+        UPDATE invoice_fts SET company_name = new.company_name
+        WHERE rowid IN (SELECT rowid FROM invoice WHERE vendor_id = new.id);
+    END""",
+    "DELETE FROM invoice_fts",
+    """INSERT INTO invoice_fts (rowid, description, company_name)
+    SELECT i.rowid, i.description, u.company_name FROM invoice i LEFT JOIN "user" u ON u.id = i.vendor_id""",
+]
+
+def upgrade(connection):
+    statements = POSTGRES if connection.dialect.name == "postgresql" else SQLITE
+    for statement in statements:
+        connection.execute(text(statement))
@@ -0,0 +1,19 @@
+"""
+Per-scope write counters behind the ETags of the invoice and notification
+lists. Rows are created on first write, so there is nothing to backfill.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+VERSION = 8
+DESCRIPTION = "list change versions"
+
+metadata = MetaData()
+
+changeversion = Table(
+    "changeversion", metadata,
+    Column("scope", String(64), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+def upgrade(connection):
+    changeversion.create(connection, checkfirst=True)
@@ -0,0 +1,37 @@
+"""
+Batch risk job progress and per-vendor results, so a job submitted to one
+worker can be polled through any other and outlives the worker's memory.
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Uuid
+
+VERSION = 9
+DESCRIPTION = "risk jobs"
+
+metadata = MetaData()
+
+riskjob = Table(
+    "riskjob", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("status", String, nullable=False),
+    Column("total", Integer, nullable=False),
+    Column("processed", Integer, nullable=False),
+    Column("failed", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+    Index("ix_riskjob_finished_at", "finished_at"),
+)
+
+riskjobresult = Table(
+    "riskjobresult", metadata,
+    Column("job_id", Uuid, ForeignKey("riskjob.id"), primary_key=True),
+    Column("position", Integer, primary_key=True),
+    Column("vendor_id", Uuid, nullable=False),
+    Column("score", Integer),
+    Column("level", String),
+    Column("engine", String),
+    Column("error", String),
+)
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
@@ -1,9 +1,17 @@
 from typing import Optional, List, Dict
+from pydantic import field_validator
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship, JSON
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
 
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Columns store naive UTC, like created_at's datetime.utcnow default
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 class UserRole(str, Enum):
     VENDOR = "vendor"
     RETAILER = "retailer"
@@ -35,6 +43,26 @@ class User(UserBase, table=True):
     invoices_as_retailer: List["Invoice"] = Relationship(back_populates="retailer", sa_relationship_kwargs={"foreign_keys": "[Invoice.retailer_id]"})
     risk_assessments: List["RiskAssessment"] = Relationship(back_populates="vendor")
 
+class Token(SQLModel):
+    access_token: str
+    token_type: str = "bearer"
+    # Seconds until access_token expires; refresh before then with refresh_token
+    expires_in: int
+    refresh_token: str
+
+class RefreshRequest(SQLModel):
+    refresh_token: str
+
+class RefreshToken(SQLModel, table=True):
+    # Only the SHA-256 of the opaque token is stored; rotation chains share a family_id
+    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    token_hash: str = Field(unique=True, index=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    family_id: uuid.UUID = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+    revoked_at: Optional[datetime] = None
+
 class InvoiceStatus(str, Enum):
     PENDING = "pending"
     APPROVED = "approved"
@@ -43,6 +71,15 @@ class InvoiceStatus(str, Enum):
     FINANCED = "financed"
 
 class Invoice(SQLModel, table=True):
+    # Matched to the listing/filter queries in routers/invoices.py; created by migration 0003
+    __table_args__ = (
+        Index("ix_invoice_created_at_id", "created_at", "id"),
+        Index("ix_invoice_vendor_created_at", "vendor_id", "created_at", "id"),
+        Index("ix_invoice_retailer_created_at", "retailer_id", "created_at"),
+        Index("ix_invoice_status_due_date", "status", "due_date"),
+        Index("ix_invoice_due_date", "due_date"),
+    )
+
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     amount: float
     description: str
@@ -55,11 +92,94 @@ class Invoice(SQLModel, table=True):
     
     retailer_id: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id")
     retailer: Optional["User"] = Relationship(back_populates="invoices_as_retailer", sa_relationship_kwargs={"foreign_keys": "[Invoice.retailer_id]"})
-    qr_code: Optional[str] = Field(default=None) # Base64 QR Code
     is_verified: bool = Field(default=False)
     ai_risk_score: Optional[int] = Field(default=None)
+    paid_at: Optional[datetime] = Field(default=None)
+    # Bumped by every status transition; clients send it back for optimistic concurrency
+    version: int = Field(default=0)
+
+class InvoiceCreate(SQLModel):
+    amount: float
+    description: str
+    due_date: datetime
+    retailer_id: Optional[uuid.UUID] = None
+
+    @field_validator("due_date")
+    @classmethod
+    def as_naive_utc(cls, value: datetime) -> datetime:
+        return naive_utc(value)
+
+class InvoiceRead(SQLModel):
+    id: uuid.UUID
+    amount: float
+    description: str
+    status: InvoiceStatus
+    due_date: datetime
+    created_at: datetime
+    vendor_id: uuid.UUID
+    retailer_id: Optional[uuid.UUID] = None
+    is_verified: bool
+    ai_risk_score: Optional[int] = None
+    paid_at: Optional[datetime] = None
+    version: int = 0
+
+class InvoiceSearchResult(InvoiceRead):
+    # Relevance; only comparable between results of the same query
+    score: float
+
+class InvoiceTransition(SQLModel):
+    # from_status and version are what the client last read; a mismatch is a 409
+    from_status: InvoiceStatus
+    to_status: InvoiceStatus
+    version: int
+
+class InvoiceTransitionItem(SQLModel):
+    id: uuid.UUID
+    version: int
+
+class InvoiceBatchTransition(SQLModel):
+    from_status: InvoiceStatus
+    to_status: InvoiceStatus
+    items: List[InvoiceTransitionItem] = Field(min_length=1, max_length=1000)
+
+class InvoiceBatchTransitionResult(SQLModel):
+    updated: List[InvoiceRead] = []
+    # {"id", "status", "version"} as currently stored, for invoices changed since the client read them
+    conflicts: List[Dict] = []
+    not_found: List[uuid.UUID] = []
+
+class InvoiceImportResult(SQLModel):
+    imported: int = 0
+    failed: int = 0
+    # {"row": n, "errors": [...]} for each rejected row, capped at the import's error limit
+    errors: List[Dict] = []
+    errors_truncated: bool = False
+
+class InvoiceStatusTotals(SQLModel):
+    count: int = 0
+    amount: float = 0
+
+class InvoiceSummary(SQLModel):
+    # "vendor", "retailer" or "all", depending on the caller's role
+    scope: str
+    by_status: Dict[str, InvoiceStatusTotals] = {}
+    total_count: int = 0
+    total_amount: float = 0
+    # Overdue and due-soon figures only cover invoices still owed (pending, approved, financed)
+    overdue_count: int = 0
+    overdue_amount: float = 0
+    due_next_7d_count: int = 0
+    due_next_7d_amount: float = 0
+    due_next_30d_count: int = 0
+    due_next_30d_amount: float = 0
+    financed_amount: float = 0
+    generated_at: datetime
 
 class RiskAssessment(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_riskassessment_vendor_created_at", "vendor_id", "created_at"),
+    )
+
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     score: int
     level: str
@@ -70,10 +190,132 @@ class RiskAssessment(SQLModel, table=True):
     vendor_id: uuid.UUID = Field(foreign_key="user.id")
     vendor: User = Relationship(back_populates="risk_assessments")
 
+class RiskAssessmentRead(SQLModel):
+    id: uuid.UUID
+    score: int
+    level: str
+    reasoning: str
+    factors: List[Dict] = []
+    created_at: datetime
+    vendor_id: uuid.UUID
+
+class VendorStats(SQLModel, table=True):
+    # Running aggregates of a vendor's invoices, maintained on every invoice write
+    vendor_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    invoice_count: int = Field(default=0)
+    total_amount: float = Field(default=0)
+    status_counts: Dict[str, int] = Field(default={}, sa_type=JSON)
+    status_amounts: Dict[str, float] = Field(default={}, sa_type=JSON)
+    paid_late_count: int = Field(default=0)
+    paid_days_total: float = Field(default=0)
+    paid_days_count: int = Field(default=0)
+    # ISO date -> amount invoiced that day, trimmed to the volume window
+    daily_volume: Dict[str, float] = Field(default={}, sa_type=JSON)
+    first_invoice_at: Optional[datetime] = None
+    last_invoice_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class RiskBatchRequest(SQLModel):
+    # Explicit vendors, or every vendor with an invoice in `invoice_status`, or all vendors
+    vendor_ids: Optional[List[uuid.UUID]] = None
+    invoice_status: Optional[InvoiceStatus] = None
+    # By default only vendors whose local score is borderline go to the model
+    analyze_all: bool = False
+
+class RiskPortfolioEntry(SQLModel):
+    vendor_id: uuid.UUID
+    company_name: Optional[str] = None
+    invoice_count: int
+    score: int
+    level: str
+    reasoning: str
+    factors: List[Dict] = []
+    # Close to a level boundary or thin history; worth a model analysis
+    borderline: bool
+
+class RiskPortfolio(SQLModel):
+    # Local scores for every vendor with invoices; `vendors` is the requested page, riskiest first
+    vendor_count: int
+    level_counts: Dict[str, int] = {}
+    borderline_count: int = 0
+    average_score: Optional[float] = None
+    total: int = 0
+    vendors: List[RiskPortfolioEntry] = []
+    generated_at: datetime
+
+class RiskJob(SQLModel, table=True):
+    # Batch analysis progress, written by the worker running the job so any worker can answer polls
+    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    # queued, running, completed, or interrupted when its worker shut down first
+    status: str = Field(default="queued")
+    total: int
+    processed: int = Field(default=0)
+    failed: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = Field(default=None, index=True)
+
+class RiskJobResult(SQLModel, table=True):
+    # One per vendor, numbered in the order they finished: score, level and engine, or the error
+    job_id: uuid.UUID = Field(foreign_key="riskjob.id", primary_key=True)
+    position: int = Field(primary_key=True)
+    vendor_id: uuid.UUID
+    score: Optional[int] = None
+    level: Optional[str] = None
+    engine: Optional[str] = None
+    error: Optional[str] = None
+
+class RiskJobStatus(SQLModel):
+    id: uuid.UUID
+    status: str
+    total: int
+    processed: int = 0
+    failed: int = 0
+    results: List[Dict] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
 class Notification(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_notification_user_created_at", "user_id", "created_at", "id"),
+        Index(
+            "ix_notification_user_unread", "user_id",
+            postgresql_where=text("NOT is_read"), sqlite_where=text("is_read = 0"),
+        ),
+    )
+
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id")
     title: str
     message: str
     is_read: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class NotificationRead(SQLModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    title: str
+    message: str
+    is_read: bool
+    created_at: datetime
+
+class NotificationCounter(SQLModel, table=True):
+    # Unread notifications per user, kept in step with every insert and mark-read
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    unread: int = Field(default=0)
+
+class ChangeVersion(SQLModel, table=True):
+    # Write counter per cached scope ("notifications:<user id>", "invoices:<vendor id>", ...),
+    # bumped in the same transaction as the write; list ETags are derived from it
+    scope: str = Field(primary_key=True, max_length=64)
+    version: int = Field(default=0)
+
+class NotificationMarkRead(SQLModel):
+    # Either explicit ids, or every notification created at or before a timestamp
+    ids: Optional[List[uuid.UUID]] = Field(default=None, max_length=1000)
+    before: Optional[datetime] = None
+
+    @field_validator("before")
+    @classmethod
+    def as_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return naive_utc(value)
@@ -2,9 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from backend.database import get_session
-from backend.models import User, UserBase, UserCreate, UserRole, UserUpdate, UserChangePassword
-from backend.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from backend.database import get_session, mark_recent_write
+from backend.models import User, UserBase, UserCreate, UserRole, UserUpdate, UserChangePassword, RefreshRequest, Token
+from backend.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash_async, verify_password_async, create_user_access_token,
+    get_current_user, invalidate_cached_user,
+)
+from backend.services.refresh_tokens import (
+    issue_refresh_token, prune_expired_tokens, revoke_token, revoke_user_tokens, rotate_refresh_token,
+)
 from typing import Annotated
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -17,7 +23,7 @@ async def register(user_in: UserCreate, session: AsyncSession = Depends(get_sess
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await get_password_hash_async(user_in.password)
     db_user = User(
         email=user_in.email,
         full_name=user_in.full_name,
@@ -28,9 +34,18 @@ async def register(user_in: UserCreate, session: AsyncSession = Depends(get_sess
     session.add(db_user)
     await session.commit()
     await session.refresh(db_user)
+    # The new user's first authenticated reads must not hit a replica that hasn't seen them yet
+    mark_recent_write(db_user.email)
     return db_user
 
-@router.post("/token")
+def token_response(user: User, refresh_token: str) -> Token:
+    return Token(
+        access_token=create_user_access_token(user),
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=refresh_token,
+    )
+
+@router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: AsyncSession = Depends(get_session)
@@ -39,15 +54,46 @@ async def login_for_access_token(
     result = await session.exec(statement)
     user = result.first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email, "role": user.role.value})
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Only password logins pay for bcrypt; sessions are extended via /auth/refresh
+    await prune_expired_tokens(session, user.id)
+    refresh_token = issue_refresh_token(session, user.id)
+    await session.commit()
+    return token_response(user, refresh_token)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    refresh_in: RefreshRequest,
+    session: AsyncSession = Depends(get_session)
+):
+    rotated = await rotate_refresh_token(session, refresh_in.refresh_token)
+    user = await session.get(User, rotated[0]) if rotated is not None else None
+    if user is None:
+        # Persists the family revocation when a rotated token was replayed
+        await session.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await session.commit()
+    return token_response(user, rotated[1])
+
+@router.post("/logout")
+async def logout(
+    refresh_in: RefreshRequest,
+    session: AsyncSession = Depends(get_session)
+):
+    await revoke_token(session, refresh_in.refresh_token)
+    await session.commit()
+    return {"status": "success"}
+
 @router.get("/me", response_model=UserBase)
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
@@ -65,6 +111,7 @@ async def update_user_me(
     
     session.add(current_user)
     await session.commit()
+    invalidate_cached_user(current_user.email)
     await session.refresh(current_user)
     return current_user
 
@@ -74,10 +121,13 @@ async def change_password(
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    if not verify_password(pwd_in.current_password, current_user.hashed_password):
+    if not await verify_password_async(pwd_in.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect current password")
     
-    current_user.hashed_password = get_password_hash(pwd_in.new_password)
+    current_user.hashed_password = await get_password_hash_async(pwd_in.new_password)
     session.add(current_user)
+    # Sign out every other session; access tokens already issued still run to expiry
+    await revoke_user_tokens(session, current_user.id)
     await session.commit()
+    invalidate_cached_user(current_user.email)
     return {"status": "success", "message": "Password updated successfully"}
@@ -1,32 +1,121 @@
-from typing import List
-from fastapi import APIRouter, Depends
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import tuple_
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from backend.database import get_session
+from backend.database import get_primary_session, get_session
 from backend.auth import get_current_user
-from backend.models import User, Invoice, InvoiceStatus
-from backend.utils.qr_generator import generate_invoice_qr
+from backend.models import (
+    User, Invoice, InvoiceBatchTransition, InvoiceBatchTransitionResult, InvoiceCreate, InvoiceImportResult,
+    InvoiceRead, InvoiceSearchResult, InvoiceStatus, InvoiceSummary, InvoiceTransition, naive_utc,
+)
+from backend.services.change_versions import LIST_CACHE_CONTROL, bump_versions, etag_matches, invoice_scopes, invoice_write_scopes, list_etag, read_version
+from backend.services.invoice_import import IMPORT_FORMATS, ImportFormatError, detect_format, import_invoices
+from backend.services.invoice_search import search_invoices
+from backend.services.invoice_summary import get_invoice_summary, invalidate_invoice_summaries
+from backend.services.invoice_transitions import InvalidTransitionError, can_transition, check_transition, current_states, transition_invoices
+from backend.services.notifications import add_notification, publish_notifications
+from backend.services.vendor_stats import record_invoice_created
+from backend.utils.pagination import decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
+from backend.utils.qr_generator import QR_RENDER_VERSION, get_invoice_qr_png
+from backend.utils.responses import read_columns, rows_response
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
-@router.get("/", response_model=List[Invoice])
+@router.get("/", response_model=List[InvoiceRead])
 async def get_invoices(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    status: Optional[InvoiceStatus] = None,
+    vendor_id: Optional[uuid.UUID] = None,
+    retailer_id: Optional[uuid.UUID] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     # Vendor sees only their invoices
     if current_user.role == "vendor":
-        statement = select(Invoice).where(Invoice.vendor_id == current_user.id)
+        vendor_id = current_user.id
     # Retailer/Bank/Admin might see all (simplified logic for now)
-    else:
-        statement = select(Invoice)
-        
+
+    # Unchanged since the client's copy: answer before running the query
+    scopes = invoice_scopes(vendor_id)
+    etag = list_etag(request, scopes, await read_version(session, scopes))
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    statement = select(*read_columns(Invoice, InvoiceRead))
+    if vendor_id is not None:
+        statement = statement.where(Invoice.vendor_id == vendor_id)
+
+    if status is not None:
+        statement = statement.where(Invoice.status == status)
+    if retailer_id is not None:
+        statement = statement.where(Invoice.retailer_id == retailer_id)
+    if due_after is not None:
+        statement = statement.where(Invoice.due_date >= naive_utc(due_after))
+    if due_before is not None:
+        statement = statement.where(Invoice.due_date < naive_utc(due_before))
+
+    # Keyset pagination: newest first, resuming strictly after the cursor row
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(Invoice.created_at, Invoice.id) < (cursor_created_at, cursor_id))
+    statement = statement.order_by(Invoice.created_at.desc(), Invoice.id.desc()).limit(limit)
+
     result = await session.exec(statement)
-    return result.all()
+    invoices = result.all()
+
+    if len(invoices) == limit:
+        last = invoices[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return rows_response(invoices, headers=headers)
+
+@router.get("/search", response_model=List[InvoiceSearchResult])
+async def search_invoices_text(
+    q: str = Query(..., min_length=1, max_length=200),
+    amount_min: Optional[float] = Query(None, ge=0),
+    amount_max: Optional[float] = Query(None, ge=0),
+    status: Optional[InvoiceStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    # Same visibility as the invoice list: vendors only search their own
+    vendor_id = current_user.id if current_user.role == "vendor" else None
+    after = decode_rank_cursor(cursor) if cursor else None
+    invoices = await search_invoices(
+        session, q, limit,
+        vendor_id=vendor_id, status=status, amount_min=amount_min, amount_max=amount_max, after=after,
+    )
+
+    headers = {}
+    if len(invoices) == limit:
+        last = invoices[-1]
+        headers["X-Next-Cursor"] = encode_rank_cursor(last.score, last.id)
+    return rows_response(invoices, headers=headers)
 
-@router.post("/", response_model=Invoice)
+@router.get("/summary", response_model=InvoiceSummary)
+async def get_invoices_summary(
+    current_user: User = Depends(get_current_user),
+    # The result is cached for everyone in the scope, so it must not come from a lagging replica
+    session: AsyncSession = Depends(get_primary_session)
+):
+    """
+    Dashboard totals over the invoices the caller can see: own invoices for
+    vendors, invoices addressed to them for retailers, everything otherwise.
+    """
+    return await get_invoice_summary(session, current_user)
+
+@router.post("/", response_model=InvoiceRead)
 async def create_invoice(
-    invoice: Invoice,
+    invoice_in: InvoiceCreate,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
@@ -34,15 +123,141 @@ async def create_invoice(
         # Only vendors can upload invoices typically
         pass 
 
-    invoice.vendor_id = current_user.id
-    session.add(invoice)
-    await session.commit()
-    await session.refresh(invoice)
-    
-    # Generate QR code
-    invoice.qr_code = generate_invoice_qr(str(invoice.id))
+    # All defaults are generated client-side, so no refresh is needed after commit
+    invoice = Invoice(**invoice_in.model_dump(), vendor_id=current_user.id)
     session.add(invoice)
+    await record_invoice_created(session, invoice)
+
+    notifications = []
+    if invoice.retailer_id is not None:
+        notifications.append(await add_notification(
+            session,
+            invoice.retailer_id,
+            "New invoice to verify",
+            f"{current_user.company_name or current_user.full_name} submitted an invoice of RWF {invoice.amount:,.0f}.",
+        ))
+    await bump_versions(session, invoice_write_scopes([invoice.vendor_id]))
+
     await session.commit()
-    await session.refresh(invoice)
-    
+    invalidate_invoice_summaries(invoice.vendor_id, [invoice.retailer_id])
+    publish_notifications(notifications)
     return invoice
+
+@router.post("/import", response_model=InvoiceImportResult)
+async def import_invoices_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Bulk-creates invoices from a CSV (header: amount, description, due_date,
+    retailer_id) or NDJSON upload. Valid rows are imported; the response
+    lists the line number and errors of every rejected row.
+    """
+    file_format = format or detect_format(file.filename, file.content_type)
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file, or pass ?format=csv|ndjson")
+
+    try:
+        return await import_invoices(session, current_user, file.file, file_format)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _check_transition(current_user: User, from_status: InvoiceStatus, to_status: InvoiceStatus):
+    try:
+        check_transition(from_status, to_status)
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not can_transition(current_user, to_status):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+def _invalidate_summaries(rows):
+    retailers_by_vendor = {}
+    for row in rows:
+        retailers_by_vendor.setdefault(row.vendor_id, set()).add(row.retailer_id)
+    for vendor_id, retailer_ids in retailers_by_vendor.items():
+        invalidate_invoice_summaries(vendor_id, retailer_ids)
+
+@router.post("/transitions", response_model=InvoiceBatchTransitionResult)
+async def transition_invoices_batch(
+    body: InvoiceBatchTransition,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Moves many invoices from one status to another in a single statement,
+    e.g. a bank's financing run (approved -> financed). Each item carries the
+    version the client read; invoices changed since are reported as conflicts
+    and the rest still go through.
+    """
+    _check_transition(current_user, body.from_status, body.to_status)
+    items = {item.id: item.version for item in body.items}
+    rows, notifications = await transition_invoices(
+        session, current_user, body.from_status, body.to_status, list(items.items())
+    )
+    missing = set(items) - {row.id for row in rows}
+    current = await current_states(session, current_user, missing) if missing else {}
+    await session.commit()
+    _invalidate_summaries(rows)
+    publish_notifications(notifications)
+    return InvoiceBatchTransitionResult(
+        updated=[row._asdict() for row in rows],
+        conflicts=[current[invoice_id] for invoice_id in items if invoice_id in current],
+        not_found=[invoice_id for invoice_id in items if invoice_id in missing and invoice_id not in current],
+    )
+
+@router.post("/{invoice_id}/transition", response_model=InvoiceRead)
+async def transition_invoice(
+    invoice_id: uuid.UUID,
+    body: InvoiceTransition,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Moves one invoice along the status graph. Succeeds only if the invoice is
+    still in `from_status` at `version`; otherwise 409 with what is stored now.
+    """
+    _check_transition(current_user, body.from_status, body.to_status)
+    rows, notifications = await transition_invoices(
+        session, current_user, body.from_status, body.to_status, [(invoice_id, body.version)]
+    )
+    if not rows:
+        current = await current_states(session, current_user, [invoice_id])
+        if invoice_id not in current:
+            raise HTTPException(status_code=404, detail="Invoice not found")
+        state = current[invoice_id]
+        raise HTTPException(status_code=409, detail={
+            "message": "Invoice was changed by someone else",
+            "status": state["status"],
+            "version": state["version"],
+        })
+
+    await session.commit()
+    _invalidate_summaries(rows)
+    publish_notifications(notifications)
+    return rows[0]._asdict()
+
+@router.get("/{invoice_id}/qr")
+async def get_invoice_qr(
+    invoice_id: uuid.UUID,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    statement = select(Invoice.vendor_id).where(Invoice.id == invoice_id)
+    result = await session.exec(statement)
+    vendor_id = result.first()
+    if vendor_id is None:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    if current_user.role == "vendor" and vendor_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    # The image is a pure function of the invoice id, so the ETag is known without rendering
+    etag = f'"qr-{QR_RENDER_VERSION}-{invoice_id}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    png = await get_invoice_qr_png(str(invoice_id))
+    return Response(content=png, media_type="image/png", headers=headers)
@@ -1,33 +1,154 @@
-from typing import List
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import uuid
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import tuple_
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from backend.database import get_session
+from backend.database import engine, get_session
 from backend.auth import get_current_user
-from backend.models import User, Notification
+from backend.models import User, Notification, NotificationMarkRead, NotificationRead
+from backend.services.change_versions import LIST_CACHE_CONTROL, etag_matches, list_etag, notification_scopes, read_version
+from backend.services.notification_broker import broker
+from backend.services.notifications import mark_read, notification_event, unread_count
+from backend.utils.pagination import decode_cursor, encode_cursor
+from backend.utils.responses import read_columns, rows_response
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-@router.get("/", response_model=List[Notification])
+# Comment frames keep proxies from closing idle streams
+STREAM_HEARTBEAT_SECONDS = 25
+# Upper bound on notifications replayed to a reconnecting stream
+STREAM_REPLAY_LIMIT = 200
+# Largest page GET /notifications/ returns
+LIST_PAGE_LIMIT = 200
+
+def _after_cursor(statement, cursor: str):
+    created_at, notification_id = decode_cursor(cursor)
+    return statement.where(tuple_(Notification.created_at, Notification.id) > (created_at, notification_id))
+
+@router.get("/", response_model=List[NotificationRead])
 async def get_notifications(
+    request: Request,
+    since: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=LIST_PAGE_LIMIT),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    statement = select(Notification).where(Notification.user_id == current_user.id).order_by(Notification.created_at.desc())
+    """
+    Newest first. `since` keeps only notifications after that cursor (new
+    ones since a poll); X-Next-Cursor, passed back as `cursor`, pages to older ones.
+    """
+    # Most polls find nothing new: answer those before running the query
+    scopes = notification_scopes(current_user.id)
+    etag = list_etag(request, scopes, await read_version(session, scopes))
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    statement = select(*read_columns(Notification, NotificationRead)).where(Notification.user_id == current_user.id)
+    if since:
+        statement = _after_cursor(statement, since)
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(Notification.created_at, Notification.id) < (cursor_created_at, cursor_id))
+    statement = statement.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit)
     result = await session.exec(statement)
-    return result.all()
+    notifications = result.all()
+
+    if len(notifications) == limit:
+        last = notifications[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return rows_response(notifications, headers=headers)
+
+@router.get("/unread-count")
+async def get_unread_count(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    return {"unread": await unread_count(session, current_user.id)}
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    since: Optional[str] = None,
+    last_event_id: Optional[str] = Header(default=None),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Server-sent events stream of new notifications. Each event id is a cursor;
+    reconnecting with it (as `since` or Last-Event-ID) replays anything missed.
+    """
+    cursor = since or last_event_id
+    if cursor:
+        decode_cursor(cursor)  # reject bad cursors before the stream starts
+    user_id = current_user.id
+    # Don't pin a pooled connection for the lifetime of the stream
+    await session.close()
+
+    async def event_stream():
+        # Subscribe before replaying so nothing published in between is lost
+        queue = broker.subscribe(user_id)
+        try:
+            replayed = set()
+            if cursor:
+                async with AsyncSession(engine) as session:
+                    statement = _after_cursor(select(Notification).where(Notification.user_id == user_id), cursor)
+                    statement = statement.order_by(Notification.created_at, Notification.id).limit(STREAM_REPLAY_LIMIT)
+                    result = await session.exec(statement)
+                    for notification in result.all():
+                        event = notification_event(notification)
+                        replayed.add(event["data"]["id"])
+                        yield f"id: {event['cursor']}\ndata: {json.dumps(event['data'])}\n\n"
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    # Dropped by the broker for falling behind
+                    break
+                if event["data"]["id"] in replayed:
+                    continue
+                yield f"id: {event['cursor']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            broker.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/read")
+async def mark_notifications_read(
+    body: NotificationMarkRead,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Marks many notifications as read in one statement: the given ids, or
+    everything created at or before `before` ("mark all read").
+    """
+    if body.ids is None and body.before is None:
+        raise HTTPException(status_code=400, detail="Provide ids or before")
+    updated = await mark_read(session, current_user.id, ids=body.ids, before=body.before)
+    unread = await unread_count(session, current_user.id)
+    await session.commit()
+    return {"updated": updated, "unread": unread}
 
 @router.post("/{notification_id}/read")
 async def mark_as_read(
-    notification_id: str,
+    notification_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    statement = select(Notification).where(Notification.id == notification_id, Notification.user_id == current_user.id)
-    result = await session.exec(statement)
-    notification = result.first()
-    if notification:
-        notification.is_read = True
-        session.add(notification)
-        await session.commit()
+    await mark_read(session, current_user.id, ids=[notification_id])
+    await session.commit()
     return {"status": "success"}
@@ -1,43 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from backend.database import get_session
+from backend.database import get_primary_session, get_session
 from backend.auth import get_current_user
-from backend.models import User, RiskAssessment
-from backend.services.ai_service import analyze_vendor_risk
+from backend.models import User, UserRole, Invoice, RiskAssessment, RiskAssessmentRead, RiskBatchRequest, RiskJobStatus, RiskPortfolio
+from backend.services.ai_service import AIServiceError, analyze_vendor_risk
+from backend.services.risk_jobs import get_job, submit_job
+from backend.services.risk_scoring import get_scored_portfolio, portfolio_page, score_vendor
+from backend.services.vendor_features import build_vendor_data
 
 router = APIRouter(prefix="/risk", tags=["risk"])
 
-@router.post("/analyze/{vendor_id}", response_model=RiskAssessment)
-async def analyze_risk(
-    vendor_id: str, 
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
-):
+# Largest portfolio a single batch job may cover
+RISK_BATCH_MAX_VENDORS = 10000
+
+def require_risk_officer(current_user: User):
     # Only Bank or Admin can run analysis
     if current_user.role not in ["bank", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # In a real app, we would fetch vendor invoice history here
-    # For now, we mock the data passing to AI
-    vendor_data = {
-        "id": vendor_id,
-        "transaction_volume": 50000,
-        "history_years": 2,
-        "late_deliveries": 1
-    }
+@router.get("/portfolio", response_model=RiskPortfolio)
+async def get_risk_portfolio(
+    level: Optional[str] = Query(default=None, pattern="^(Low|Medium|High)$"),
+    borderline: Optional[bool] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    current_user: User = Depends(get_current_user),
+    # Scored once for all risk officers, so it must not come from a lagging replica
+    session: AsyncSession = Depends(get_primary_session)
+):
+    """
+    Local scores for every vendor with invoices, computed together from their
+    invoice statistics; no model calls. Borderline vendors are the ones
+    worth an explicit /risk/analyze. Rescored at most every
+    RISK_PORTFOLIO_CACHE_TTL_SECONDS per worker.
+    """
+    require_risk_officer(current_user)
+
+    scored = await get_scored_portfolio(session)
+    return portfolio_page(scored, level, borderline, limit, offset)
+
+@router.post("/analyze/{vendor_id}", response_model=RiskAssessmentRead)
+async def analyze_risk(
+    vendor_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    require_risk_officer(current_user)
 
-    analysis_result = await analyze_vendor_risk(vendor_data)
+    vendor_data = await build_vendor_data(session, vendor_id)
+    try:
+        analysis_result = await analyze_vendor_risk(vendor_data, fail_open=False)
+    except AIServiceError:
+        # A score from the vendor's own history beats a fixed neutral one
+        analysis_result = score_vendor(vendor_data)
+        analysis_result["reasoning"] = "Model unavailable. " + analysis_result["reasoning"]
 
     risk_record = RiskAssessment(
-        vendor_id=vendor_id, # Assuming UUID is passed as string
+        vendor_id=vendor_id,
         score=analysis_result.get("score", 0),
         level=analysis_result.get("level", "Unknown"),
         reasoning=analysis_result.get("reasoning", ""),
         factors=analysis_result.get("factors", [])
     )
-    
+
     session.add(risk_record)
+    # Defaults are generated client-side, so no refresh is needed after commit
     await session.commit()
-    await session.refresh(risk_record)
-    
+
     return risk_record
+
+@router.post("/analyze-batch", response_model=RiskJobStatus, status_code=202)
+async def analyze_risk_batch(
+    batch: RiskBatchRequest,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    require_risk_officer(current_user)
+
+    statement = select(User.id).where(User.role == UserRole.VENDOR)
+    if batch.vendor_ids is not None:
+        statement = statement.where(User.id.in_(batch.vendor_ids))
+    if batch.invoice_status is not None:
+        vendors_with_status = select(Invoice.vendor_id).where(Invoice.status == batch.invoice_status)
+        statement = statement.where(User.id.in_(vendors_with_status))
+    statement = statement.limit(RISK_BATCH_MAX_VENDORS + 1)
+
+    result = await session.exec(statement)
+    vendor_ids = result.all()
+    if len(vendor_ids) > RISK_BATCH_MAX_VENDORS:
+        raise HTTPException(status_code=400, detail=f"A batch may cover at most {RISK_BATCH_MAX_VENDORS} vendors")
+
+    return await submit_job(vendor_ids, analyze_all=batch.analyze_all)
+
+@router.get("/jobs/{job_id}", response_model=RiskJobStatus)
+async def get_risk_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    # Progress is written by whichever worker runs the job; a lagging replica would show it behind
+    session: AsyncSession = Depends(get_primary_session)
+):
+    require_risk_officer(current_user)
+
+    job = await get_job(session, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
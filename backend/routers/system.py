@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import text
+from backend import lifecycle
+from backend.auth import get_current_user, user_cache
+from backend.database import engine, probe_engine, recent_writers, replicas
+from backend.middleware import admission_stats
+from backend.models import User
+from backend.services.ai_service import ai_service_stats, result_cache
+from backend.services.hashing import hashing_stats
+from backend.services.invoice_summary import summary_cache
+from backend.services.notification_broker import broker
+from backend.services.risk_scoring import portfolio_cache
+from backend.services.worker_bus import bus
+from backend.utils.metrics import register_collector
+from backend.utils.qr_generator import qr_cache
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+# A database slower than this counts as down for readiness
+READINESS_TIMEOUT_SECONDS = float(os.environ.get("READINESS_TIMEOUT_SECONDS", 2))
+
+CACHES = {
+    "user": user_cache, "qr": qr_cache, "ai_result": result_cache,
+    "invoice_summary": summary_cache, "risk_portfolio": portfolio_cache,
+}
+
+def cache_metrics():
+    for name, cache in CACHES.items():
+        yield "cache_entries", "gauge", "Entries held by in-process caches", {"cache": name}, len(cache)
+    for name, cache in CACHES.items():
+        yield "cache_hits_total", "counter", "In-process cache hits", {"cache": name}, cache.hits
+    for name, cache in CACHES.items():
+        yield "cache_misses_total", "counter", "In-process cache misses", {"cache": name}, cache.misses
+    yield "notification_streams", "gauge", "Open notification streams", {}, broker.subscriber_count()
+
+register_collector(cache_metrics)
+
+@router.get("/health")
+async def health():
+    """
+    Liveness: the worker's event loop is serving requests.
+    """
+    return {"status": "ok", "pid": os.getpid(), "uptime_seconds": round(time.time() - lifecycle.started_at, 1)}
+
+async def _ping_database():
+    async with probe_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+@router.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness: this worker can take new requests. Fails while draining for
+    shutdown or when the primary database does not answer in time.
+    """
+    body = {"status": "ready", "pid": os.getpid(), "pool": engine.sync_engine.pool.status()}
+    if lifecycle.draining:
+        body["status"] = "draining"
+    else:
+        try:
+            await asyncio.wait_for(_ping_database(), READINESS_TIMEOUT_SECONDS)
+        except Exception as e:
+            body["status"] = "database unavailable"
+            body["error"] = f"{type(e).__name__}: {e}"
+    if body["status"] != "ready":
+        response.status_code = 503
+    return body
+
+@router.get("/stats")
+async def get_stats(current_user: User = Depends(get_current_user)):
+    # Operational counters are only exposed to admins
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return {
+        "hashing": hashing_stats(),
+        "admission": admission_stats(),
+        "user_cache": user_cache.stats(),
+        "notification_streams": broker.subscriber_count(),
+        "qr_cache": qr_cache.stats(),
+        "ai": ai_service_stats(),
+        "invoice_summary_cache": summary_cache.stats(),
+        "replicas": {replica.name: replica.stats() for replica in replicas},
+        "recent_writers": len(recent_writers),
+        "worker_bus": bus.stats(),
+    }
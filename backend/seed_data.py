@@ -1,18 +1,42 @@
+"""
+Database seeding.
 
+    python -m backend.seed_data                  # small demo dataset, skipped if users exist
+    python -m backend.seed_data synthetic --vendors 2000 --retailers 300 --invoices 1000000
+
+`synthetic` generates a deterministic scale-test dataset: the same --seed and
+--now always produce the same rows. Everything is written with batched Core
+inserts, every user shares one precomputed password hash, and QR codes are
+left to be rendered on first request, so a million invoices load in minutes.
+Vendor stats and unread counters are rebuilt once at the end.
+"""
+import argparse
 import asyncio
+import bisect
+import itertools
+import math
+import random
+import time
 import uuid
 from datetime import datetime, timedelta
-from sqlmodel import select
+from typing import Dict, Iterator, List, Sequence
+from sqlalchemy import insert, text
+from sqlmodel import SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from backend.database import engine, init_db, get_session
-from backend.models import User, UserRole, Invoice, InvoiceStatus, RiskAssessment
+from backend.database import engine, get_session
+from backend.migrations import upgrade
+from backend.models import User, UserRole, Invoice, InvoiceStatus, Notification, RiskAssessment
 from backend.auth import get_password_hash
-from backend.utils.qr_generator import generate_invoice_qr
+from backend.services.change_versions import bump_all_versions
+from backend.services.notifications import rebuild_unread_counters
+from backend.services.vendor_stats import rebuild_vendor_stats
+
+SEED_PASSWORD = "password123"
 
 async def seed_data():
     print("Initializng database...")
-    await init_db()
-    
+    await upgrade(engine)
+
     async for session in get_session():
         # Check if we already have users
         statement = select(User)
@@ -28,53 +52,44 @@ async def seed_data():
                 "full_name": "System Administrator",
                 "role": UserRole.ADMIN,
                 "company_name": "KaziFlow HQ",
-                "password": "password123"
             },
             {
                 "email": "bank@bk.rw",
                 "full_name": "BK Financing Officer",
                 "role": UserRole.BANK,
                 "company_name": "Bank of Kigali",
-                "password": "password123"
             },
             {
                 "email": "simba@retail.rw",
                 "full_name": "Simba Supermarket Manager",
                 "role": UserRole.RETAILER,
                 "company_name": "Simba Supermarket",
-                "password": "password123"
             },
             {
                 "email": "vendor@agri.rw",
                 "full_name": "Jean Bosco",
                 "role": UserRole.VENDOR,
                 "company_name": "Bosco Agri-Supplies",
-                "password": "password123"
             },
             {
                 "email": "farmer@coop.rw",
                 "full_name": "Alice Mutoni",
                 "role": UserRole.VENDOR,
                 "company_name": "Musanze Farmer Group",
-                "password": "password123"
             }
         ]
 
-        created_users = {}
-        for u_data in users_to_create:
-            hashed = get_password_hash(u_data.pop("password"))
-            user = User(**u_data, hashed_password=hashed)
-            session.add(user)
-            created_users[u_data["email"]] = user
-        
+        # Every demo account has the same password, so bcrypt runs once
+        hashed = get_password_hash(SEED_PASSWORD)
+        # ids are generated client-side, so nothing needs refreshing after commit
+        created_users = {u_data["email"]: User(**u_data, hashed_password=hashed) for u_data in users_to_create}
+        session.add_all(created_users.values())
         await session.commit()
-        for u in created_users.values():
-            await session.refresh(u)
 
         print("Seeding invoices...")
         vendor = created_users["vendor@agri.rw"]
         retailer = created_users["simba@retail.rw"]
-        
+
         invoices = [
             Invoice(
                 amount=750000,
@@ -84,7 +99,8 @@ async def seed_data():
                 vendor_id=vendor.id,
                 retailer_id=retailer.id,
                 is_verified=True,
-                ai_risk_score=92
+                ai_risk_score=92,
+                version=1,
             ),
             Invoice(
                 amount=1200000,
@@ -103,22 +119,255 @@ async def seed_data():
                 vendor_id=created_users["farmer@coop.rw"].id,
                 retailer_id=retailer.id,
                 is_verified=True,
-                ai_risk_score=85
+                ai_risk_score=85,
+                paid_at=datetime.utcnow() - timedelta(days=7),
+                version=2,
             )
         ]
 
-        for inv in invoices:
-            session.add(inv)
-        
-        await session.commit()
-        for inv in invoices:
-            await session.refresh(inv)
-            # Generate QR code after commit to have the ID
-            inv.qr_code = generate_invoice_qr(str(inv.id))
-            session.add(inv)
-            
+        session.add_all(invoices)
         await session.commit()
+        await rebuild_vendor_stats(session)
+        await bump_all_versions(session)
         print("Data seeding completed successfully!")
 
+# --- Synthetic scale-test data ----------------------------------------------
+
+SYNTHETIC_EMAIL_DOMAIN = "seed.kaziflow.test"
+
+FIRST_NAMES = ["Jean", "Alice", "Eric", "Grace", "Patrick", "Diane", "Emmanuel", "Claudine", "Olivier", "Aline",
+               "Innocent", "Josiane", "Didier", "Solange", "Fabrice", "Chantal", "Thierry", "Ange", "Yves", "Divine"]
+LAST_NAMES = ["Mugisha", "Uwase", "Habimana", "Mukamana", "Niyonzima", "Ingabire", "Nshimiyimana", "Uwimana",
+              "Hakizimana", "Umutoni", "Bizimana", "Iradukunda", "Ndayisaba", "Mutesi", "Twagirimana", "Keza"]
+PLACES = ["Kigali", "Musanze", "Huye", "Rubavu", "Nyagatare", "Muhanga", "Rwamagana", "Karongi", "Rusizi", "Kayonza"]
+VENDOR_TRADES = ["Agri-Supplies", "Coffee Growers", "Dairy Cooperative", "Textiles", "Packaging", "Fresh Produce",
+                 "Hardware", "Beverages", "Poultry Farm", "Tea Estate", "Logistics", "Bakery Supplies"]
+RETAIL_TRADES = ["Supermarket", "Mini-Market", "Wholesalers", "Hotel Group", "Pharmacy", "Restaurants", "Stores"]
+BANK_NAMES = ["Bank of Kigali", "Equity Bank Rwanda", "I&M Bank Rwanda", "Access Bank Rwanda", "Cogebanque", "BPR Bank"]
+GOODS = ["Premium Coffee Beans", "Organic Fertilizer", "Fresh Vegetables", "Maize Flour", "Packaged Milk", "Tea Leaves",
+         "Cooking Oil", "Cement Bags", "Cotton Fabric", "Bottled Water", "Eggs", "Irish Potatoes", "Rice", "Beans"]
+
+# Net payment terms in days, with how often each is used
+PAYMENT_TERMS = [7, 14, 30, 45, 60, 90]
+PAYMENT_TERM_WEIGHTS = [5, 15, 45, 15, 12, 8]
+
+NOTIFICATION_KINDS = [
+    ("New invoice to verify", "{company} submitted an invoice of RWF {amount:,.0f}."),
+    ("Invoice approved", "Your invoice of RWF {amount:,.0f} was approved."),
+    ("Invoice financed", "Your invoice of RWF {amount:,.0f} was financed."),
+    ("Invoice paid", "Your invoice of RWF {amount:,.0f} was paid."),
+    ("Payment due soon", "An invoice of RWF {amount:,.0f} is due within 7 days."),
+]
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+def _pareto_weights(rng: random.Random, count: int, alpha: float) -> List[float]:
+    # Cumulative weights: a few very active accounts, a long tail of small ones
+    return list(itertools.accumulate(rng.paretovariate(alpha) for _ in range(count)))
+
+def _pick(rng: random.Random, items: Sequence, cumulative: List[float]):
+    return items[bisect.bisect_left(cumulative, rng.random() * cumulative[-1])]
+
+def _users(rng: random.Random, role: UserRole, count: int, hashed_password: str) -> List[Dict]:
+    users = []
+    for i in range(count):
+        if role == UserRole.VENDOR:
+            company = f"{rng.choice(PLACES)} {rng.choice(VENDOR_TRADES)} {i}"
+        elif role == UserRole.RETAILER:
+            company = f"{rng.choice(PLACES)} {rng.choice(RETAIL_TRADES)} {i}"
+        else:
+            company = f"{BANK_NAMES[i % len(BANK_NAMES)]} {i // len(BANK_NAMES) or ''}".strip()
+        users.append({
+            "id": _uuid(rng),
+            "email": f"{role.value}-{i}@{SYNTHETIC_EMAIL_DOMAIN}",
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "role": role,
+            "company_name": company,
+            "hashed_password": hashed_password,
+        })
+    return users
+
+def _invoice_status(rng: random.Random, created_at: datetime, due_date: datetime, now: datetime):
+    """
+    Status, paid_at and version for an invoice of this age: recent invoices
+    are mostly pending, older ones mostly approved or financed, and most
+    past their due date are paid, some of them late.
+    """
+    if now - created_at < timedelta(days=3):
+        status = rng.choices([InvoiceStatus.PENDING, InvoiceStatus.APPROVED, InvoiceStatus.REJECTED], [70, 25, 5])[0]
+    elif due_date > now:
+        status = rng.choices(
+            [InvoiceStatus.PENDING, InvoiceStatus.APPROVED, InvoiceStatus.FINANCED, InvoiceStatus.PAID, InvoiceStatus.REJECTED],
+            [15, 45, 30, 5, 5],
+        )[0]
+    else:
+        status = rng.choices(
+            [InvoiceStatus.PAID, InvoiceStatus.FINANCED, InvoiceStatus.APPROVED, InvoiceStatus.REJECTED], [80, 8, 7, 5]
+        )[0]
+
+    paid_at = None
+    version = {InvoiceStatus.PENDING: 0, InvoiceStatus.APPROVED: 1, InvoiceStatus.REJECTED: 1, InvoiceStatus.FINANCED: 2}.get(status)
+    if status == InvoiceStatus.PAID:
+        # Around the due date, skewed late
+        paid_at = due_date + timedelta(days=rng.gauss(2, 8))
+        paid_at = min(max(paid_at, created_at + timedelta(hours=1)), now)
+        version = rng.choice((2, 3))  # paid straight after approval, or after financing
+    return status, paid_at, version
+
+def _invoices(rng: random.Random, count: int, vendor_ids: List[uuid.UUID], retailer_ids: List[uuid.UUID], now: datetime, days: int) -> Iterator[Dict]:
+    vendor_weights = _pareto_weights(rng, len(vendor_ids), 1.2)
+    retailer_weights = _pareto_weights(rng, len(retailer_ids), 1.5) if retailer_ids else None
+    for _ in range(count):
+        # sqrt skews towards recent dates, like a growing platform
+        age = days * (1 - math.sqrt(rng.random()))
+        created_at = (now - timedelta(days=age)).replace(microsecond=0)
+        due_date = created_at + timedelta(days=rng.choices(PAYMENT_TERMS, PAYMENT_TERM_WEIGHTS)[0])
+        status, paid_at, version = _invoice_status(rng, created_at, due_date, now)
+        # Log-normal around RWF 400k with a long tail of large orders
+        amount = round(min(rng.lognormvariate(math.log(400_000), 1.1), 250_000_000), -2) or 100.0
+        yield {
+            "id": _uuid(rng),
+            "amount": amount,
+            "description": f"{rng.choice(GOODS)} - batch {rng.randint(1, 9999)}",
+            "status": status,
+            "due_date": due_date,
+            "created_at": created_at,
+            "vendor_id": _pick(rng, vendor_ids, vendor_weights),
+            # A few invoices are drafted before the buyer is on the platform
+            "retailer_id": _pick(rng, retailer_ids, retailer_weights) if retailer_weights and rng.random() < 0.95 else None,
+            "is_verified": status not in (InvoiceStatus.PENDING, InvoiceStatus.REJECTED),
+            "ai_risk_score": rng.randint(20, 98) if rng.random() < 0.3 else None,
+            "paid_at": paid_at,
+            "version": version,
+        }
+
+def _notifications(rng: random.Random, count: int, user_ids: List[uuid.UUID], now: datetime, days: int) -> Iterator[Dict]:
+    weights = _pareto_weights(rng, len(user_ids), 1.3)
+    for _ in range(count):
+        age = days * (1 - math.sqrt(rng.random()))
+        title, template = rng.choice(NOTIFICATION_KINDS)
+        yield {
+            "id": _uuid(rng),
+            "user_id": _pick(rng, user_ids, weights),
+            "title": title,
+            "message": template.format(company=f"{rng.choice(PLACES)} {rng.choice(VENDOR_TRADES)}", amount=round(rng.lognormvariate(math.log(400_000), 1.1), -2)),
+            # Older notifications have mostly been read
+            "is_read": rng.random() < min(0.95, 0.2 + age / 14),
+            "created_at": (now - timedelta(days=age)).replace(microsecond=0),
+        }
+
+def _risk_assessments(rng: random.Random, count: int, vendor_ids: List[uuid.UUID], now: datetime, days: int) -> Iterator[Dict]:
+    # Each vendor has a stable underlying quality; assessments scatter around it
+    quality = {vendor_id: rng.betavariate(5, 2) * 100 for vendor_id in vendor_ids}
+    for _ in range(count):
+        vendor_id = rng.choice(vendor_ids)
+        score = int(min(max(rng.gauss(quality[vendor_id], 8), 0), 100))
+        level = "Low" if score >= 70 else "Medium" if score >= 40 else "High"
+        yield {
+            "id": _uuid(rng),
+            "score": score,
+            "level": level,
+            "reasoning": f"Synthetic assessment: {level.lower()} risk based on payment history and volume.",
+            "factors": [
+                {"label": "Payment delay history", "impact": round(rng.uniform(-1, 1), 2)},
+                {"label": "Transaction frequency", "impact": round(rng.uniform(-1, 1), 2)},
+            ],
+            "created_at": (now - timedelta(days=rng.uniform(0, days))).replace(microsecond=0),
+            "vendor_id": vendor_id,
+        }
+
+async def _bulk_insert(session: AsyncSession, model, rows: Iterator[Dict], total: int, batch_size: int):
+    started = time.perf_counter()
+    done = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        # executemany: compiled once, sent as multi-row INSERTs by the driver
+        await session.exec(insert(model.__table__), params=batch)
+        await session.commit()
+        done += len(batch)
+        elapsed = time.perf_counter() - started
+        print(f"  {model.__tablename__}: {done:,}/{total:,} ({done / elapsed:,.0f} rows/s)", end="\r", flush=True)
+    if total:
+        print()
+
+async def reset_database(keep: Sequence[str] = ()):
+    """
+    Drops every table except those named in `keep`, so the next upgrade()
+    rebuilds the schema from scratch. Used by every seeder's --reset.
+    """
+    async with engine.begin() as conn:
+        # The search index tables come from migrations, not the models; Postgres' references invoice
+        await conn.execute(text("DROP TABLE IF EXISTS invoice_search"))
+        await conn.execute(text("DROP TABLE IF EXISTS invoice_fts"))
+        tables = [table for table in SQLModel.metadata.sorted_tables if table.name not in keep]
+        await conn.run_sync(SQLModel.metadata.drop_all, tables=tables)
+        await conn.execute(text("DROP TABLE IF EXISTS schema_version"))
+
+async def seed_synthetic(args):
+    now = datetime.fromisoformat(args.now) if args.now else datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    if args.reset:
+        # Change versions survive, so ETags handed out before the reset can't match the new data
+        await reset_database(keep=("changeversion",))
+    await upgrade(engine)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        if not args.reset and (await session.exec(select(User.id).where(User.email.like(f"%@{SYNTHETIC_EMAIL_DOMAIN}")).limit(1))).first():
+            print("Synthetic data already present; pass --reset to regenerate it.")
+            return
+
+        # One bcrypt run for every account instead of one per user
+        hashed = get_password_hash(SEED_PASSWORD)
+        vendors = _users(rng, UserRole.VENDOR, args.vendors, hashed)
+        retailers = _users(rng, UserRole.RETAILER, args.retailers, hashed)
+        banks = _users(rng, UserRole.BANK, args.banks, hashed)
+        await _bulk_insert(session, User, iter(vendors + retailers + banks), len(vendors) + len(retailers) + len(banks), args.batch_size)
+
+        vendor_ids = [user["id"] for user in vendors]
+        retailer_ids = [user["id"] for user in retailers]
+        if not vendor_ids:
+            args.invoices = args.risk_assessments = 0
+        else:
+            await _bulk_insert(session, Invoice, _invoices(rng, args.invoices, vendor_ids, retailer_ids, now, args.days), args.invoices, args.batch_size)
+            await _bulk_insert(session, RiskAssessment, _risk_assessments(rng, args.risk_assessments, vendor_ids, now, args.days), args.risk_assessments, args.batch_size)
+        if vendor_ids or retailer_ids:
+            await _bulk_insert(session, Notification, _notifications(rng, args.notifications, vendor_ids + retailer_ids, now, args.days), args.notifications, args.batch_size)
+
+        print("Rebuilding vendor stats and unread counters...")
+        await rebuild_vendor_stats(session)
+        await rebuild_unread_counters(session)
+        await bump_all_versions(session)
+
+    print(f"Seeded {len(vendors):,} vendors, {len(retailers):,} retailers, {len(banks):,} banks and "
+          f"{args.invoices:,} invoices in {time.perf_counter() - started:.1f}s; "
+          f"every account's password is {SEED_PASSWORD!r}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the KaziFlow database.")
+    subparsers = parser.add_subparsers(dest="command")
+    synthetic = subparsers.add_parser("synthetic", help="Generate a deterministic scale-test dataset")
+    synthetic.add_argument("--vendors", type=int, default=1000)
+    synthetic.add_argument("--retailers", type=int, default=200)
+    synthetic.add_argument("--banks", type=int, default=5)
+    synthetic.add_argument("--invoices", type=int, default=100_000)
+    synthetic.add_argument("--notifications", type=int, default=50_000)
+    synthetic.add_argument("--risk-assessments", type=int, default=5_000)
+    synthetic.add_argument("--days", type=int, default=365, help="History spanned by the generated rows")
+    synthetic.add_argument("--seed", type=int, default=1)
+    synthetic.add_argument("--now", help="Anchor timestamp (ISO, naive UTC); defaults to today's midnight")
+    synthetic.add_argument("--batch-size", type=int, default=10_000, help="Rows per INSERT batch and transaction")
+    synthetic.add_argument("--reset", action="store_true", help="Drop every table first (destroys all data)")
+    args = parser.parse_args(argv)
+
+    if args.command == "synthetic":
+        asyncio.run(seed_synthetic(args))
+    else:
+        asyncio.run(seed_data())
+
 if __name__ == "__main__":
-    asyncio.run(seed_data())
+    main()
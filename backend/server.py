@@ -0,0 +1,170 @@
+"""
+Production server: a supervisor process that imports the app once, binds the
+listening socket and forks N uvicorn workers sharing it. Workers are
+restarted when they die and drained on SIGTERM: readiness fails first, open
+notification streams are closed, then in-flight requests get up to
+DRAIN_TIMEOUT_SECONDS to finish. A second SIGINT stops at once.
+
+Run through `python start_backend.py --production --workers N`.
+"""
+import asyncio
+import os
+import signal
+import sys
+import time
+import traceback
+from typing import Dict, List
+import uvicorn
+
+# In-flight requests still running after this are cancelled
+DRAIN_TIMEOUT_SECONDS = float(os.environ.get("DRAIN_TIMEOUT_SECONDS", 30))
+# Keep accepting requests this long after SIGTERM while readiness reports
+# draining, for load balancers that only stop routing after a failed probe
+DRAIN_DELAY_SECONDS = float(os.environ.get("DRAIN_DELAY_SECONDS", 0))
+# A worker that dies sooner than this after starting is restarted with a growing delay
+WORKER_MIN_UPTIME_SECONDS = 30
+WORKER_MAX_RESTART_DELAY_SECONDS = 30
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that drains before shutting down and exits when its
+    supervisor is gone.
+    """
+
+    def __init__(self, config: uvicorn.Config):
+        super().__init__(config)
+        self.parent_pid = os.getppid()
+        self._loop = None
+
+    async def serve(self, sockets=None):
+        self._loop = asyncio.get_running_loop()
+        await super().serve(sockets=sockets)
+
+    def handle_exit(self, sig, frame):
+        from backend import lifecycle
+        if self._loop is None:
+            super().handle_exit(sig, frame)
+        elif lifecycle.draining:
+            if sig == signal.SIGINT:
+                self.should_exit = self.force_exit = True
+        else:
+            # Runs inside the signal handler; let the event loop do the work
+            self._loop.call_soon_threadsafe(self._begin_drain)
+
+    def _begin_drain(self):
+        from backend import lifecycle
+        lifecycle.begin_drain()
+        self._loop.call_later(DRAIN_DELAY_SECONDS, self._stop_accepting)
+
+    def _stop_accepting(self):
+        from backend import lifecycle
+        # Streams opened during the delay would otherwise hold up shutdown
+        lifecycle.begin_drain()
+        self.should_exit = True
+
+    async def on_tick(self, counter: int) -> bool:
+        from backend import lifecycle
+        if os.getppid() != self.parent_pid and not lifecycle.draining:
+            print(f"Worker {os.getpid()}: supervisor exited, shutting down")
+            self._begin_drain()
+        return await super().on_tick(counter)
+
+def _run_worker(config: uvicorn.Config, sock) -> int:
+    from backend.database import reset_after_fork
+    # Signals reach workers only through the supervisor, so Ctrl+C in a terminal drains once
+    os.setpgid(0, 0)
+    # uvicorn re-raises the signal it stopped on; it must not run the supervisor's handler
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *args: None)
+    reset_after_fork()
+
+    server = DrainingServer(config)
+    server.run(sockets=[sock])
+    # Same exit status as uvicorn when the app's startup failed
+    return 0 if server.started else 3
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.sock = config.bind_socket()
+        # pid -> start time
+        self.children: Dict[int, float] = {}
+        self.pending: List[float] = []
+        self.restart_delay = 0.0
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(self.config, self.sock)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+
+    def handle_signal(self, sig, frame):
+        if not self.stopping:
+            print(f"Supervisor: {signal.Signals(sig).name}, draining {len(self.children)} workers")
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                continue
+            # Back off while workers keep dying young, e.g. when the database is down at startup
+            if time.monotonic() - started < WORKER_MIN_UPTIME_SECONDS:
+                self.restart_delay = min(max(self.restart_delay * 2, 1), WORKER_MAX_RESTART_DELAY_SECONDS)
+            else:
+                self.restart_delay = 0
+            print(f"Supervisor: worker {pid} exited with {code}, restarting in {self.restart_delay:.0f}s")
+            self.pending.append(time.monotonic() + self.restart_delay)
+            self.pending.sort()
+
+    def run(self):
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.handle_signal)
+        print(f"Supervisor {os.getpid()}: starting {self.workers} workers")
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children or (self.pending and not self.stopping):
+            time.sleep(0.1)
+            self.reap()
+            now = time.monotonic()
+            while self.pending and not self.stopping and self.pending[0] <= now:
+                self.pending.pop(0)
+                self.spawn()
+        self.sock.close()
+        print("Supervisor: all workers stopped")
+
+def run(host: str, port: int, workers: int):
+    """
+    Serves backend.main:app with `workers` processes. Set WEB_CONCURRENCY
+    before backend.main is imported so pools are sized for the worker count.
+    """
+    options = {"host": host, "port": port, "timeout_graceful_shutdown": DRAIN_TIMEOUT_SECONDS}
+    if not hasattr(os, "fork"):
+        # No fork (Windows): uvicorn's own workers, each importing the app, without draining
+        uvicorn.run("backend.main:app", workers=workers, **options)
+        return
+
+    from backend.main import app
+    Supervisor(uvicorn.Config(app, **options), workers).run()
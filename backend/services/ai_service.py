@@ -1,34 +1,107 @@
-from google import genai
-from google.genai import types
+import asyncio
+import hashlib
 import os
 import json
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional
+from backend.utils.cache import TTLCache
+from backend.utils.metrics import Counter, Histogram
+
+if TYPE_CHECKING:
+    # google.genai takes most of a second to import; it loads with the first model call
+    from google import genai
 
 api_key = os.environ.get("GOOGLE_API_KEY")
+# Point at a local fake model server when testing
+AI_BASE_URL = os.environ.get("GEMINI_BASE_URL")
+AI_MODEL = os.environ.get("AI_MODEL", "gemini-2.0-flash")
+AI_TIMEOUT_SECONDS = float(os.environ.get("AI_TIMEOUT_SECONDS", 20))
+AI_CACHE_TTL_SECONDS = float(os.environ.get("AI_CACHE_TTL_SECONDS", 900))
+AI_CACHE_MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", 5000))
 
-async def analyze_vendor_risk(vendor_data: dict) -> dict:
-    if not api_key:
-        # Initial Mock for when API Key is missing during dev
-        return {
-            "score": 85,
-            "level": "Low",
-            "reasoning": "Mock analysis: API Key not set.",
-            "factors": [{"label": "Mock Factor", "impact": 0.8}]
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "score": {"type": "NUMBER"},
+        "level": {"type": "STRING"},
+        "reasoning": {"type": "STRING"},
+        "factors": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "label": {"type": "STRING"},
+                    "impact": {"type": "NUMBER"}
+                }
+            }
         }
+    }
+}
+
+class AIServiceError(Exception):
+    """Raised when the model call fails or misses its deadline."""
+
+# Async callable taking the prompt and returning the parsed JSON verdict
+ModelBackend = Callable[[str], Awaitable[dict]]
 
-    client = genai.Client(api_key=api_key)
-    
-    prompt = f"""
+_client: Optional["genai.Client"] = None
+_backend: Optional[ModelBackend] = None
+# Fingerprint -> task of the analysis currently running for that exact data
+_in_flight: Dict[str, asyncio.Task] = {}
+result_cache = TTLCache(maxsize=AI_CACHE_MAX_ENTRIES, ttl=AI_CACHE_TTL_SECONDS)
+ai_stats = {"calls": 0, "failures": 0, "timeouts": 0, "coalesced": 0}
+AI_CALL_SECONDS = Histogram("ai_call_duration_seconds", "Latency of model calls", ("outcome",))
+AI_CALL_FAILURES = Counter("ai_call_failures_total", "Failed model calls", ("reason",))
+
+def get_client() -> "genai.Client":
+    # One client (and connection pool) per process instead of one per call
+    global _client
+    if _client is None:
+        from google import genai
+        from google.genai import types
+        http_options = types.HttpOptions(
+            base_url=AI_BASE_URL,
+            timeout=int(AI_TIMEOUT_SECONDS * 1000),
+        )
+        _client = genai.Client(api_key=api_key, http_options=http_options)
+    return _client
+
+async def _gemini_backend(prompt: str) -> dict:
+    response = await get_client().aio.models.generate_content(
+        model=AI_MODEL,
+        contents=prompt,
+        config={
+            "response_mime_type": "application/json",
+            "response_schema": RESPONSE_SCHEMA,
+        }
+    )
+    return json.loads(response.text)
+
+def set_model_backend(backend: Optional[ModelBackend]):
+    """
+    Replaces the Gemini call with a stub (None restores it) and clears
+    cached results, so tests never reach the real API.
+    """
+    global _backend
+    _backend = backend
+    result_cache.clear()
+
+def vendor_fingerprint(vendor_data: dict) -> str:
+    return hashlib.sha256(json.dumps(vendor_data, sort_keys=True, default=str).encode()).hexdigest()
+
+def build_prompt(vendor_data: dict) -> str:
+    return f"""
     Analyze the following vendor supply chain data and provide a fintech risk score (0-100).
     A higher score means LOWER risk (safer).
-    
-    Data: {json.dumps(vendor_data)}
-    
+
+    Data: {json.dumps(vendor_data, default=str)}
+
     Consider:
     - Transaction frequency
     - Payment delay history
     - Delivery consistency
     - FIFO (First-In-First-Out) transaction flow health
-    
+
     Return a valid JSON object with:
     - score (number)
     - level (string: Low, Medium, High)
@@ -36,38 +109,77 @@ async def analyze_vendor_risk(vendor_data: dict) -> dict:
     - factors (list of objects with label and impact)
     """
 
+async def _run_analysis(fingerprint: str, vendor_data: dict) -> dict:
+    backend = _backend or _gemini_backend
+    ai_stats["calls"] += 1
+    started = time.perf_counter()
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json",
-                "response_schema": {
-                    "type": "OBJECT",
-                    "properties": {
-                        "score": {"type": "NUMBER"},
-                        "level": {"type": "STRING"},
-                        "reasoning": {"type": "STRING"},
-                        "factors": {
-                            "type": "ARRAY",
-                            "items": {
-                                "type": "OBJECT",
-                                "properties": {
-                                    "label": {"type": "STRING"},
-                                    "impact": {"type": "NUMBER"}
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        )
-        return json.loads(response.text)
+        result = await asyncio.wait_for(backend(build_prompt(vendor_data)), timeout=AI_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        ai_stats["timeouts"] += 1
+        AI_CALL_SECONDS.observe(time.perf_counter() - started, "timeout")
+        AI_CALL_FAILURES.inc("timeout")
+        print(f"AI Error: analysis timed out after {AI_TIMEOUT_SECONDS}s")
+        raise AIServiceError(f"analysis timed out after {AI_TIMEOUT_SECONDS}s")
     except Exception as e:
+        ai_stats["failures"] += 1
+        AI_CALL_SECONDS.observe(time.perf_counter() - started, "error")
+        AI_CALL_FAILURES.inc("error")
         print(f"AI Error: {e}")
+        raise AIServiceError(str(e)) from e
+
+    AI_CALL_SECONDS.observe(time.perf_counter() - started, "success")
+    # Only successful verdicts are cached; failures are retried on the next call
+    result_cache.set(fingerprint, result)
+    return result
+
+def fallback_result() -> dict:
+    return {
+        "score": 50,
+        "level": "Medium",
+        "reasoning": "AI Analysis Failed, using fallback.",
+        "factors": []
+    }
+
+async def analyze_vendor_risk(vendor_data: dict, fail_open: bool = True) -> dict:
+    """
+    Scores a vendor with the model. On failure returns a neutral fallback
+    verdict, or raises AIServiceError when fail_open is False.
+    """
+    if not api_key and _backend is None:
+        # Initial Mock for when API Key is missing during dev
         return {
-            "score": 50,
-            "level": "Medium",
-            "reasoning": "AI Analysis Failed, using fallback.",
-            "factors": []
+            "score": 85,
+            "level": "Low",
+            "reasoning": "Mock analysis: API Key not set.",
+            "factors": [{"label": "Mock Factor", "impact": 0.8}]
         }
+
+    fingerprint = vendor_fingerprint(vendor_data)
+    cached = result_cache.get(fingerprint)
+    if cached is not None:
+        return dict(cached)
+
+    # Single flight: concurrent requests for the same data share one model call
+    task = _in_flight.get(fingerprint)
+    if task is None:
+        task = asyncio.ensure_future(_run_analysis(fingerprint, vendor_data))
+        _in_flight[fingerprint] = task
+        task.add_done_callback(lambda _: _in_flight.pop(fingerprint, None))
+    else:
+        ai_stats["coalesced"] += 1
+
+    try:
+        # Shielded so one caller disconnecting doesn't cancel the shared call
+        return dict(await asyncio.shield(task))
+    except AIServiceError:
+        if not fail_open:
+            raise
+        return fallback_result()
+
+def ai_service_stats() -> dict:
+    return {
+        **ai_stats,
+        "in_flight": len(_in_flight),
+        "cache": result_cache.stats(),
+    }
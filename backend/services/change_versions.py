@@ -0,0 +1,89 @@
+import hashlib
+import uuid
+from typing import Iterable, List, Optional
+from fastapi import Request
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import ChangeVersion
+
+# The version shared by everyone who sees all invoices is split over this many
+# rows, so writers for different vendors don't queue on one row lock; readers sum them
+INVOICE_VERSION_STRIPES = 16
+ALL_INVOICE_SCOPES = [f"invoices:all:{stripe}" for stripe in range(INVOICE_VERSION_STRIPES)]
+
+# Per-user data: browsers keep it but revalidate every time; shared caches must not store it
+LIST_CACHE_CONTROL = "private, no-cache"
+
+def notification_scopes(user_id: uuid.UUID) -> List[str]:
+    return [f"notifications:{user_id}"]
+
+def invoice_scopes(vendor_id: Optional[uuid.UUID]) -> List[str]:
+    """
+    Scopes to read for an invoice list: a single vendor's invoices, or all of them.
+    """
+    return [f"invoices:{vendor_id}"] if vendor_id is not None else ALL_INVOICE_SCOPES
+
+def invoice_write_scopes(vendor_ids: Iterable[uuid.UUID]) -> List[str]:
+    scopes = set()
+    for vendor_id in vendor_ids:
+        scopes.add(f"invoices:{vendor_id}")
+        scopes.add(ALL_INVOICE_SCOPES[vendor_id.int % INVOICE_VERSION_STRIPES])
+    return sorted(scopes)
+
+async def bump_versions(session: AsyncSession, scopes: Iterable[str]):
+    """
+    Stages a version bump for each scope in the caller's transaction, so
+    the new version becomes visible together with the write it describes.
+    """
+    # Sorted so concurrent writers lock version rows in the same order
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    dialect = session.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_ = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert_(ChangeVersion).values([{"scope": scope, "version": 1} for scope in scopes])
+        statement = statement.on_conflict_do_update(
+            index_elements=["scope"],
+            set_={"version": ChangeVersion.version + 1},
+        )
+        await session.exec(statement)
+        return
+
+    for scope in scopes:
+        result = await session.exec(select(ChangeVersion).where(ChangeVersion.scope == scope).with_for_update())
+        row = result.first() or ChangeVersion(scope=scope)
+        row.version += 1
+        session.add(row)
+
+async def bump_all_versions(session: AsyncSession):
+    """
+    Invalidates every ETag handed out so far, for data changed behind the
+    services' back (seeding, manual fixes).
+    """
+    statement = update(ChangeVersion).values(version=ChangeVersion.version + 1).execution_options(synchronize_session=False)
+    await session.exec(statement)
+    await session.commit()
+
+async def read_version(session: AsyncSession, scopes: List[str]) -> int:
+    """
+    Current version of a list. Read it before the rows it describes: a write
+    committing in between then gets a newer version than the one attached
+    to the response, so it is never answered with a stale 304.
+    """
+    result = await session.exec(select(func.coalesce(func.sum(ChangeVersion.version), 0)).where(ChangeVersion.scope.in_(scopes)))
+    return result.one()
+
+def list_etag(request: Request, scopes: List[str], version: int) -> str:
+    # Filters and cursors change the rows without changing the version
+    variant = hashlib.blake2b(f"{scopes[0]}|{request.url.query}".encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{variant}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison, as If-None-Match requires
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from backend.utils.metrics import Counter, Histogram, register_collector
+
+# "thread" works well because bcrypt releases the GIL; "process" isolates the CPU entirely
+HASH_POOL_KIND = os.environ.get("HASH_POOL_KIND", "thread")
+HASH_POOL_SIZE = int(os.environ.get("HASH_POOL_SIZE", os.cpu_count() or 2))
+# Jobs allowed to wait for a free worker before new ones are rejected with 503
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", 32))
+
+BCRYPT_SECONDS = Histogram("bcrypt_duration_seconds", "bcrypt run time inside the worker pool", ("op",))
+BCRYPT_WAIT_SECONDS = Histogram("bcrypt_queue_wait_seconds", "Time bcrypt jobs waited for a free worker", ("op",))
+BCRYPT_REJECTED = Counter("bcrypt_rejected_total", "bcrypt jobs rejected because the queue was full", ("op",))
+
+_executor: Optional[Executor] = None
+_in_flight = 0
+_stats: Dict[str, Dict[str, float]] = {}
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if HASH_POOL_KIND == "process":
+            _executor = ProcessPoolExecutor(max_workers=HASH_POOL_SIZE)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=HASH_POOL_SIZE, thread_name_prefix="bcrypt")
+    return _executor
+
+def _timed(fn: Callable, *args):
+    # Runs inside the worker so the measured time excludes queueing
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+def _entry(op: str) -> Dict[str, float]:
+    return _stats.setdefault(op, {"calls": 0, "rejected": 0, "wait_seconds": 0.0, "run_seconds": 0.0, "max_run_seconds": 0.0})
+
+def _record(op: str, wait: float, run: float):
+    entry = _entry(op)
+    entry["calls"] += 1
+    entry["wait_seconds"] += wait
+    entry["run_seconds"] += run
+    entry["max_run_seconds"] = max(entry["max_run_seconds"], run)
+    BCRYPT_SECONDS.observe(run, op)
+    BCRYPT_WAIT_SECONDS.observe(wait, op)
+
+async def run_hash_job(op: str, fn: Callable, *args):
+    """
+    Runs a blocking hash function on the bounded worker pool.
+    Fails fast with 503 when the pool and its queue are already full.
+    """
+    global _in_flight
+    if _in_flight >= HASH_POOL_SIZE + HASH_QUEUE_LIMIT:
+        _entry(op)["rejected"] += 1
+        BCRYPT_REJECTED.inc(op)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    _in_flight += 1
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        result, run = await loop.run_in_executor(_get_executor(), _timed, fn, *args)
+    finally:
+        _in_flight -= 1
+    _record(op, time.perf_counter() - started - run, run)
+    return result
+
+def hashing_stats() -> dict:
+    return {
+        "pool_kind": HASH_POOL_KIND,
+        "pool_size": HASH_POOL_SIZE,
+        "queue_limit": HASH_QUEUE_LIMIT,
+        "in_flight": _in_flight,
+        "operations": {op: dict(entry) for op, entry in _stats.items()},
+    }
+
+def _pool_metrics():
+    yield "bcrypt_in_flight", "gauge", "bcrypt jobs running or queued", {}, _in_flight
+
+register_collector(_pool_metrics)
+
+def shutdown_hash_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,175 @@
+import asyncio
+import codecs
+import csv
+import json
+import os
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlmodel import insert, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import Invoice, InvoiceCreate, InvoiceImportResult, InvoiceStatus, User
+from backend.services.change_versions import bump_versions, invoice_write_scopes
+from backend.services.invoice_summary import invalidate_invoice_summaries
+from backend.services.notifications import add_notifications, publish_notifications
+from backend.services.vendor_stats import record_invoice_rows_created
+
+# Rows validated and written per transaction
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 1000))
+# Rejected rows reported back in full; beyond this only the count is kept
+IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", 1000))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+REQUIRED_COLUMNS = ("amount", "description", "due_date")
+
+class ImportFormatError(ValueError):
+    """Raised when the upload as a whole cannot be parsed."""
+
+# (line number in the file, parsed fields or a parse error message)
+ParsedRow = Tuple[int, Optional[Dict], Optional[str]]
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+def _lines(file: BinaryIO) -> Iterator[str]:
+    # Decodes line by line, so the upload is never held in memory as one string
+    return codecs.iterdecode(file, "utf-8-sig")
+
+def parse_csv(file: BinaryIO) -> Iterator[ParsedRow]:
+    reader = csv.DictReader(_lines(file))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ImportFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+    for row in reader:
+        # Blank cells mean "not given", so optional fields fall back to their defaults
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}, None
+
+def parse_ndjson(file: BinaryIO) -> Iterator[ParsedRow]:
+    for line_number, line in enumerate(_lines(file), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, data, None
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()]
+
+class _Report:
+    def __init__(self):
+        self.result = InvoiceImportResult()
+
+    def reject(self, row: Optional[int], errors: List[str]):
+        self.result.failed += 1
+        if len(self.result.errors) < IMPORT_MAX_ERRORS:
+            self.result.errors.append({"row": row, "errors": errors})
+        else:
+            self.result.errors_truncated = True
+
+async def _unknown_retailers(session: AsyncSession, retailer_ids: set) -> set:
+    if not retailer_ids:
+        return set()
+    result = await session.exec(select(User.id).where(User.id.in_(retailer_ids)))
+    return retailer_ids - set(result.all())
+
+async def _import_chunk(session: AsyncSession, vendor_id: uuid.UUID, vendor_name: str, rows: List[ParsedRow], report: _Report):
+    candidates: List[Tuple[int, InvoiceCreate]] = []
+    for line_number, data, parse_error in rows:
+        if parse_error is not None:
+            report.reject(line_number, [parse_error])
+            continue
+        try:
+            candidates.append((line_number, InvoiceCreate.model_validate(data)))
+        except ValidationError as e:
+            report.reject(line_number, _validation_messages(e))
+
+    # A dangling retailer would fail the whole INSERT on its foreign key
+    unknown = await _unknown_retailers(session, {row.retailer_id for _, row in candidates if row.retailer_id})
+    now = datetime.utcnow()
+    line_numbers: List[int] = []
+    invoice_rows: List[Dict] = []
+    for line_number, row in candidates:
+        if row.retailer_id in unknown:
+            report.reject(line_number, [f"retailer_id: Unknown retailer {row.retailer_id}"])
+            continue
+        # Plain rows skip building ORM objects; id and the other defaults come from the column defaults
+        line_numbers.append(line_number)
+        invoice_rows.append({
+            **row.model_dump(),
+            "vendor_id": vendor_id,
+            "status": InvoiceStatus.PENDING,
+            "created_at": now,
+        })
+    if not invoice_rows:
+        return
+
+    per_retailer: Dict[uuid.UUID, List[Dict]] = {}
+    for invoice_row in invoice_rows:
+        if invoice_row["retailer_id"] is not None:
+            per_retailer.setdefault(invoice_row["retailer_id"], []).append(invoice_row)
+
+    try:
+        # executemany: compiled once, sent as multi-row INSERTs by the driver
+        await session.exec(insert(Invoice.__table__), params=invoice_rows)
+        await record_invoice_rows_created(session, invoice_rows)
+        # One summary per retailer per chunk instead of one per invoice
+        summaries = []
+        for retailer_id, retailer_rows in per_retailer.items():
+            total = sum(invoice_row["amount"] for invoice_row in retailer_rows)
+            summaries.append((
+                retailer_id,
+                "New invoices to verify",
+                f"{vendor_name} submitted {len(retailer_rows)} invoice(s) totalling RWF {total:,.0f}.",
+            ))
+        notifications = await add_notifications(session, summaries)
+        await bump_versions(session, invoice_write_scopes([vendor_id]))
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        print(f"Invoice import: chunk of {len(invoice_rows)} rows failed: {e}")
+        for line_number in line_numbers:
+            report.reject(line_number, [f"Database error: {type(e).__name__}"])
+        return
+
+    report.result.imported += len(invoice_rows)
+    invalidate_invoice_summaries(vendor_id, per_retailer)
+    publish_notifications(notifications)
+
+async def import_invoices(session: AsyncSession, vendor: User, file: BinaryIO, file_format: str) -> InvoiceImportResult:
+    """
+    Streams invoices from a CSV or NDJSON upload into the vendor's account,
+    one transaction per chunk. Bad rows are reported, not fatal; rows in
+    chunks committed before a failure stay imported.
+    """
+    parser = parse_csv if file_format == "csv" else parse_ndjson
+    # Read up front: each chunk commit expires the user if it belongs to this session
+    vendor_id, vendor_name = vendor.id, vendor.company_name or vendor.full_name
+    report = _Report()
+    rows = parser(file)
+    while True:
+        try:
+            # Parsing reads the spooled upload, which may have rolled over to disk
+            chunk = await asyncio.to_thread(lambda: list(islice(rows, IMPORT_CHUNK_SIZE)))
+        except (UnicodeDecodeError, csv.Error) as e:
+            if not report.result.imported and not report.result.failed:
+                raise ImportFormatError(f"Could not parse upload: {e}") from e
+            # Earlier chunks are already committed; report where parsing stopped
+            report.reject(None, [f"Could not parse the rest of the file: {e}"])
+            break
+        if not chunk:
+            break
+        await _import_chunk(session, vendor_id, vendor_name, chunk, report)
+    return report.result
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import re
+import unicodedata
+import uuid
+from typing import List, Optional, Tuple
+from sqlalchemy import Float, and_, cast, column, literal_column, or_, table, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import Invoice, InvoiceRead, InvoiceStatus
+from backend.utils.responses import read_columns
+
+# Words beyond this are ignored; each one narrows the match, so more add cost without adding results
+MAX_TERMS = 8
+
+# Maintained by triggers from migration m0007; see there for the schema
+invoice_search = table("invoice_search", column("invoice_id"), column("document", TSVECTOR))
+invoice_fts = table("invoice_fts", column("rowid"), column("description"), column("company_name"))
+
+def search_terms(q: str) -> List[str]:
+    """
+    Lower-cased, accent-free words of a query, folded like the indexed text.
+    Only word characters survive, so nothing the user types can reach the
+    tsquery or FTS5 query syntax.
+    """
+    decomposed = unicodedata.normalize("NFKD", q.lower())
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.findall(r"\w+", folded)[:MAX_TERMS]
+
+def _ranked(dialect: str, terms: List[str]):
+    # Every term must match, the last ones as prefixes so results show up while typing
+    if dialect == "postgresql":
+        query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        score = cast(func.ts_rank(invoice_search.c.document, query), Float)
+        return (
+            select(*read_columns(Invoice, InvoiceRead), score.label("score"))
+            .join(invoice_search, invoice_search.c.invoice_id == Invoice.id)
+            .where(invoice_search.c.document.op("@@")(query))
+        )
+
+    # bm25 is lower for better matches; description counts double the company name
+    match = " ".join(f'"{term}"*' for term in terms)
+    score = -func.bm25(literal_column("invoice_fts"), 2.0, 1.0)
+    return (
+        select(*read_columns(Invoice, InvoiceRead), score.label("score"))
+        .join(invoice_fts, invoice_fts.c.rowid == literal_column("invoice.rowid"))
+        .where(literal_column("invoice_fts").op("MATCH")(match))
+    )
+
+async def search_invoices(
+    session: AsyncSession,
+    q: str,
+    limit: int,
+    vendor_id: Optional[uuid.UUID] = None,
+    status: Optional[InvoiceStatus] = None,
+    amount_min: Optional[float] = None,
+    amount_max: Optional[float] = None,
+    after: Optional[Tuple[float, uuid.UUID]] = None,
+) -> List:
+    """
+    Invoices matching every word of `q` in their description or vendor's
+    company name, best first, as read_columns rows plus a `score`. `after`
+    is the (score, id) of the last row of the previous page.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    ranked = _ranked(session.bind.dialect.name, terms)
+    if vendor_id is not None:
+        ranked = ranked.where(Invoice.vendor_id == vendor_id)
+    if status is not None:
+        ranked = ranked.where(Invoice.status == status)
+    if amount_min is not None:
+        ranked = ranked.where(Invoice.amount >= amount_min)
+    if amount_max is not None:
+        ranked = ranked.where(Invoice.amount <= amount_max)
+
+    # Ranking functions can't appear in WHERE on SQLite, so page over the ranked rows instead
+    ranked = ranked.subquery("ranked")
+    statement = select(*ranked.c)
+    if after is not None:
+        score, row_id = after
+        statement = statement.where(or_(ranked.c.score < score, and_(ranked.c.score == score, ranked.c.id > row_id)))
+    statement = statement.order_by(ranked.c.score.desc(), ranked.c.id).limit(limit)
+    result = await session.exec(statement)
+    return result.all()
+
+REBUILD = {
+    "postgresql": [
+        "DELETE FROM invoice_search",
+        """INSERT INTO invoice_search (invoice_id, document)
+        SELECT i.id, invoice_search_document(i.description, u.company_name)
+        FROM invoice i LEFT JOIN "user" u ON u.id = i.vendor_id""",
+    ],
+    "sqlite": [
+        "DELETE FROM invoice_fts",
+        """INSERT INTO invoice_fts (rowid, description, company_name)
+        SELECT i.rowid, i.description, u.company_name FROM invoice i LEFT JOIN "user" u ON u.id = i.vendor_id""",
+    ],
+}
+
+async def rebuild_search_index(session: AsyncSession):
+    """
+    Re-indexes every invoice, for data loaded with the triggers disabled or,
+    on SQLite, after a VACUUM has renumbered invoice rowids.
+    """
+    for statement in REBUILD[session.bind.dialect.name]:
+        await session.exec(text(statement))
+    await session.commit()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Maintain the invoice full-text search index.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    from backend.database import engine, init_db
+    await init_db()
+    async with AsyncSession(engine) as session:
+        await rebuild_search_index(session)
+    print("Rebuilt the invoice search index.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Hashable, Iterable, List, Optional
+from sqlalchemy import case, func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import Invoice, InvoiceStatus, InvoiceStatusTotals, InvoiceSummary, User, UserRole
+from backend.services.worker_bus import bus
+from backend.utils.cache import TTLCache
+
+# Short, since overdue/due-soon buckets move with the clock even without writes
+SUMMARY_CACHE_TTL_SECONDS = float(os.environ.get("SUMMARY_CACHE_TTL_SECONDS", 30))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", 10000))
+
+# Still owed by the retailer, so counted towards overdue and due-soon totals
+OPEN_STATUSES = (InvoiceStatus.PENDING, InvoiceStatus.APPROVED, InvoiceStatus.FINANCED)
+
+summary_cache = TTLCache(maxsize=SUMMARY_CACHE_MAX_ENTRIES, ttl=SUMMARY_CACHE_TTL_SECONDS)
+# Bumped on every invalidation so a summary computed across a write is not cached
+_generation = 0
+
+def summary_scope(user: User) -> Hashable:
+    if user.role == UserRole.VENDOR:
+        return ("vendor", user.id)
+    if user.role == UserRole.RETAILER:
+        return ("retailer", user.id)
+    return ("all",)
+
+def _invalidate_scopes(scopes: List[List[str]]):
+    # Scopes arrive as [kind, id] pairs, the shape they take on the worker bus
+    global _generation
+    _generation += 1
+    for kind, scope_id in scopes:
+        summary_cache.invalidate((kind, uuid.UUID(scope_id)))
+    summary_cache.invalidate(("all",))
+
+def _reset_summaries():
+    global _generation
+    _generation += 1
+    summary_cache.clear()
+
+bus.subscribe("invoice_summary", _invalidate_scopes, on_reset=_reset_summaries)
+
+def invalidate_invoice_summaries(vendor_id: uuid.UUID, retailer_ids: Iterable[Optional[uuid.UUID]] = ()):
+    """
+    Drops the cached summaries that include a vendor's (and retailers')
+    invoices, on every worker. Call after committing an invoice write.
+    """
+    scopes = [["vendor", str(vendor_id)]]
+    scopes.extend(["retailer", str(retailer_id)] for retailer_id in set(retailer_ids) if retailer_id is not None)
+    bus.publish("invoice_summary", scopes)
+
+def _amount_where(condition):
+    return func.coalesce(func.sum(case((condition, Invoice.amount), else_=0)), 0)
+
+def _count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+async def compute_invoice_summary(session: AsyncSession, scope: Hashable, now: Optional[datetime] = None) -> InvoiceSummary:
+    """
+    One grouped query over the scope's invoices: per-status totals plus the
+    overdue and due-soon buckets, which are summed over the open statuses.
+    """
+    now = now or datetime.utcnow()
+    overdue = Invoice.due_date < now
+    due_7d = (Invoice.due_date >= now) & (Invoice.due_date < now + timedelta(days=7))
+    due_30d = (Invoice.due_date >= now) & (Invoice.due_date < now + timedelta(days=30))
+
+    statement = select(
+        Invoice.status,
+        func.count(),
+        func.coalesce(func.sum(Invoice.amount), 0),
+        _count_where(overdue), _amount_where(overdue),
+        _count_where(due_7d), _amount_where(due_7d),
+        _count_where(due_30d), _amount_where(due_30d),
+    ).group_by(Invoice.status)
+    if scope[0] == "vendor":
+        statement = statement.where(Invoice.vendor_id == scope[1])
+    elif scope[0] == "retailer":
+        statement = statement.where(Invoice.retailer_id == scope[1])
+
+    summary = InvoiceSummary(
+        scope=scope[0],
+        by_status={status.value: InvoiceStatusTotals() for status in InvoiceStatus},
+        generated_at=now,
+    )
+    result = await session.exec(statement)
+    for status, count, amount, overdue_count, overdue_amount, due_7d_count, due_7d_amount, due_30d_count, due_30d_amount in result.all():
+        status = InvoiceStatus(status)
+        summary.by_status[status.value] = InvoiceStatusTotals(count=count, amount=amount)
+        summary.total_count += count
+        summary.total_amount += amount
+        if status in OPEN_STATUSES:
+            summary.overdue_count += overdue_count
+            summary.overdue_amount += overdue_amount
+            summary.due_next_7d_count += due_7d_count
+            summary.due_next_7d_amount += due_7d_amount
+            summary.due_next_30d_count += due_30d_count
+            summary.due_next_30d_amount += due_30d_amount
+    summary.financed_amount = summary.by_status[InvoiceStatus.FINANCED.value].amount
+    return summary
+
+async def get_invoice_summary(session: AsyncSession, user: User) -> InvoiceSummary:
+    scope = summary_scope(user)
+    cached = summary_cache.get(scope)
+    if cached is not None:
+        return cached
+
+    generation = _generation
+    summary = await compute_invoice_summary(session, scope)
+    if generation == _generation:
+        summary_cache.set(scope, summary)
+    return summary
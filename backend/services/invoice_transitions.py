@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+from sqlalchemy import tuple_
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import Invoice, InvoiceRead, InvoiceStatus, Notification, User, UserRole
+from backend.services.change_versions import bump_versions, invoice_write_scopes
+from backend.services.notifications import add_notifications
+from backend.services.vendor_stats import record_status_changes
+from backend.utils.responses import read_columns
+
+# Allowed moves between statuses; REJECTED and PAID are final
+INVOICE_TRANSITIONS = {
+    InvoiceStatus.PENDING: (InvoiceStatus.APPROVED, InvoiceStatus.REJECTED),
+    InvoiceStatus.APPROVED: (InvoiceStatus.FINANCED, InvoiceStatus.PAID),
+    InvoiceStatus.FINANCED: (InvoiceStatus.PAID,),
+}
+
+# Who may move an invoice into each status. Retailers only act on invoices addressed to them.
+TRANSITION_ROLES = {
+    InvoiceStatus.APPROVED: (UserRole.RETAILER, UserRole.ADMIN),
+    InvoiceStatus.REJECTED: (UserRole.RETAILER, UserRole.ADMIN),
+    InvoiceStatus.FINANCED: (UserRole.BANK, UserRole.ADMIN),
+    InvoiceStatus.PAID: (UserRole.RETAILER, UserRole.BANK, UserRole.ADMIN),
+}
+
+class InvalidTransitionError(ValueError):
+    """Raised for a move the status graph does not allow."""
+
+def check_transition(from_status: InvoiceStatus, to_status: InvoiceStatus):
+    if to_status not in INVOICE_TRANSITIONS.get(from_status, ()):
+        raise InvalidTransitionError(f"Cannot move an invoice from {from_status.value} to {to_status.value}")
+
+def can_transition(user: User, to_status: InvoiceStatus) -> bool:
+    return user.role in TRANSITION_ROLES.get(to_status, ())
+
+def _scoped(statement, user: User):
+    if user.role == UserRole.RETAILER:
+        return statement.where(Invoice.retailer_id == user.id)
+    return statement
+
+def _vendor_notifications(rows: Sequence, to_status: InvoiceStatus) -> List[Tuple[uuid.UUID, str, str]]:
+    # One notification per vendor, so a financing run doesn't flood anyone's inbox
+    by_vendor: Dict[uuid.UUID, List] = {}
+    for row in rows:
+        by_vendor.setdefault(row.vendor_id, []).append(row)
+    items = []
+    for vendor_id, vendor_rows in by_vendor.items():
+        total = sum(row.amount for row in vendor_rows)
+        if len(vendor_rows) == 1:
+            message = f"Your invoice of RWF {total:,.0f} was {to_status.value}."
+        else:
+            message = f"{len(vendor_rows)} of your invoices totalling RWF {total:,.0f} were {to_status.value}."
+        items.append((vendor_id, f"Invoice {to_status.value}", message))
+    return items
+
+async def transition_invoices(
+    session: AsyncSession,
+    user: User,
+    from_status: InvoiceStatus,
+    to_status: InvoiceStatus,
+    items: Sequence[Tuple[uuid.UUID, int]],
+) -> Tuple[List, List[Notification]]:
+    """
+    Moves the given (id, version) invoices from `from_status` to `to_status`
+    in one conditional UPDATE ... RETURNING, bumping their versions. Invoices
+    whose status or version moved on since the client read them are simply
+    not returned. Stats and vendor notifications are staged in the same
+    transaction; commit, then publish the notifications.
+    """
+    check_transition(from_status, to_status)
+    now = datetime.utcnow()
+    values = {"status": to_status, "version": Invoice.version + 1}
+    if to_status == InvoiceStatus.PAID:
+        values["paid_at"] = now
+
+    ids = [invoice_id for invoice_id, _ in items]
+    statement = update(Invoice).where(
+        Invoice.id.in_(ids),
+        tuple_(Invoice.id, Invoice.version).in_(list(items)),
+        Invoice.status == from_status,
+    )
+    statement = (
+        _scoped(statement, user)
+        .values(**values)
+        .returning(*read_columns(Invoice, InvoiceRead))
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.exec(statement)
+    rows = result.all()
+    if not rows:
+        return rows, []
+
+    await record_status_changes(session, rows, from_status, now)
+    notifications = await add_notifications(session, _vendor_notifications(rows, to_status))
+    await bump_versions(session, invoice_write_scopes({row.vendor_id for row in rows}))
+    return rows, notifications
+
+async def current_states(session: AsyncSession, user: User, ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, Dict]:
+    """
+    Status and version as stored, for explaining a failed transition. Invoices
+    outside the user's scope are left out, so they read as not found.
+    """
+    statement = _scoped(select(Invoice.id, Invoice.status, Invoice.version).where(Invoice.id.in_(ids)), user)
+    result = await session.exec(statement)
+    return {row.id: {"id": row.id, "status": row.status, "version": row.version} for row in result.all()}
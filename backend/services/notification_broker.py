@@ -0,0 +1,56 @@
+import asyncio
+import uuid
+from typing import Dict, Set
+
+# Per-subscriber buffer; a client that falls this far behind is dropped and
+# catches up through the `since` cursor when it reconnects.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+class NotificationBroker:
+    """
+    In-process pub/sub fan-out of newly created notifications to the open
+    streams of their recipient. Only reaches streams served by this worker.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[uuid.UUID, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, user_id: uuid.UUID) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: uuid.UUID, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def publish(self, user_id: uuid.UUID, event: dict):
+        for queue in list(self._subscribers.get(user_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Signal the stream to close so the client resyncs from its cursor
+                self.unsubscribe(user_id, queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def close_all(self):
+        """
+        Ends every open stream; clients reconnect (to another worker, when
+        draining) and resume from their cursor.
+        """
+        for user_id, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self.unsubscribe(user_id, queue)
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+broker = NotificationBroker()
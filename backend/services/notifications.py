@@ -0,0 +1,130 @@
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import delete, func, insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import Notification, NotificationCounter
+from backend.services.change_versions import bump_versions, notification_scopes
+from backend.services.notification_broker import broker
+from backend.services.worker_bus import bus
+from backend.utils.pagination import encode_cursor
+
+def notification_event(notification: Notification) -> dict:
+    """
+    Serializes a notification for the stream, tagged with its keyset cursor.
+    """
+    return {
+        "cursor": encode_cursor(notification.created_at, notification.id),
+        "data": notification.model_dump(mode="json"),
+    }
+
+async def _increment_unread(session: AsyncSession, counts: Dict[uuid.UUID, int]):
+    dialect = session.bind.dialect.name
+    # Sorted so concurrent batches lock counter rows in the same order
+    user_ids = sorted(counts)
+    if dialect in ("postgresql", "sqlite"):
+        insert_ = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert_(NotificationCounter).values([{"user_id": user_id, "unread": counts[user_id]} for user_id in user_ids])
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={"unread": NotificationCounter.unread + statement.excluded.unread},
+        )
+        await session.exec(statement)
+        return
+
+    for user_id in user_ids:
+        result = await session.exec(select(NotificationCounter).where(NotificationCounter.user_id == user_id).with_for_update())
+        counter = result.first() or NotificationCounter(user_id=user_id)
+        counter.unread += counts[user_id]
+        session.add(counter)
+
+async def add_notifications(session: AsyncSession, items: Iterable[Tuple[uuid.UUID, str, str]]) -> List[Notification]:
+    """
+    Stages (user_id, title, message) notifications in the caller's transaction
+    as one INSERT plus one counter update. Pass the result to
+    publish_notifications once that transaction has committed.
+    """
+    now = datetime.utcnow()
+    notifications = [Notification(user_id=user_id, title=title, message=message, created_at=now) for user_id, title, message in items]
+    if not notifications:
+        return notifications
+
+    await session.exec(insert(Notification.__table__), params=[notification.model_dump() for notification in notifications])
+    counts: Dict[uuid.UUID, int] = {}
+    for notification in notifications:
+        counts[notification.user_id] = counts.get(notification.user_id, 0) + 1
+    await _increment_unread(session, counts)
+    await bump_versions(session, [scope for user_id in counts for scope in notification_scopes(user_id)])
+    return notifications
+
+async def add_notification(session: AsyncSession, user_id: uuid.UUID, title: str, message: str) -> Notification:
+    notifications = await add_notifications(session, [(user_id, title, message)])
+    return notifications[0]
+
+def _deliver(events: List[List]):
+    for user_id, event in events:
+        broker.publish(uuid.UUID(user_id), event)
+
+# Streams that may have missed events while the bus was down resync from their cursor
+bus.subscribe("notification", _deliver, on_reset=broker.close_all)
+
+def publish_notifications(notifications: Iterable[Notification]):
+    """
+    Pushes committed notifications to their recipients' open streams, on
+    whichever worker holds them.
+    """
+    bus.publish("notification", [[str(notification.user_id), notification_event(notification)] for notification in notifications])
+
+async def create_notification(session: AsyncSession, user_id: uuid.UUID, title: str, message: str) -> Notification:
+    """
+    Persists a notification and pushes it to the recipient's open streams.
+    """
+    notification = await add_notification(session, user_id, title, message)
+    await session.commit()
+    publish_notifications([notification])
+    return notification
+
+async def mark_read(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    ids: Optional[List[uuid.UUID]] = None,
+    before: Optional[datetime] = None,
+) -> int:
+    """
+    Marks a user's unread notifications as read in one UPDATE, limited to the
+    given ids and/or those created at or before `before`. Returns how many
+    changed; the unread counter drops by exactly that, so concurrent calls
+    never decrement it twice for the same row.
+    """
+    statement = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+    if ids is not None:
+        statement = statement.where(Notification.id.in_(ids))
+    if before is not None:
+        statement = statement.where(Notification.created_at <= before)
+    result = await session.exec(statement.values(is_read=True).execution_options(synchronize_session=False))
+    updated = result.rowcount
+    if updated:
+        statement = (
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread=NotificationCounter.unread - updated)
+            .execution_options(synchronize_session=False)
+        )
+        await session.exec(statement)
+        await bump_versions(session, notification_scopes(user_id))
+    return updated
+
+async def unread_count(session: AsyncSession, user_id: uuid.UUID) -> int:
+    result = await session.exec(select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id))
+    return result.first() or 0
+
+async def rebuild_unread_counters(session: AsyncSession):
+    """
+    Recomputes every counter from the notification rows, for data written
+    around add_notifications (fixtures, manual fixes).
+    """
+    await session.exec(delete(NotificationCounter))
+    unread = select(Notification.user_id, func.count()).where(Notification.is_read == False).group_by(Notification.user_id)
+    await session.exec(insert(NotificationCounter).from_select(["user_id", "unread"], unread))
+    await session.commit()
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlmodel import delete, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import RefreshToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+
+def hash_token(token: str) -> str:
+    # Tokens are 256 random bits, so a fast unsalted hash is enough (unlike passwords)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def issue_refresh_token(session: AsyncSession, user_id: uuid.UUID, family_id: Optional[uuid.UUID] = None) -> str:
+    """
+    Stages a new refresh token in the caller's transaction and returns its
+    opaque value; only the hash is stored.
+    """
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    session.add(RefreshToken(
+        token_hash=hash_token(token),
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4(),
+        created_at=now,
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+async def rotate_refresh_token(session: AsyncSession, token: str) -> Optional[Tuple[uuid.UUID, str]]:
+    """
+    Revokes a live refresh token and stages its successor in the same family.
+    Returns (user_id, new token), or None if the token is unknown, expired or
+    already used. Reuse of a rotated token revokes its whole family, since
+    one of the two holders is not the user. Commit in both cases.
+    """
+    now = datetime.utcnow()
+    token_hash = hash_token(token)
+    # Conditional UPDATE: of two concurrent refreshes with one token, only one wins
+    statement = (
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == token_hash, RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > now)
+        .values(revoked_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.exec(statement)
+    row = result.first()
+    if row is None:
+        statement = select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == token_hash, RefreshToken.revoked_at.is_not(None)
+        )
+        result = await session.exec(statement)
+        family_id = result.first()
+        if family_id is not None:
+            await revoke_family(session, family_id)
+        return None
+
+    user_id, family_id = row
+    return user_id, issue_refresh_token(session, user_id, family_id)
+
+async def revoke_family(session: AsyncSession, family_id: uuid.UUID):
+    statement = (
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await session.exec(statement)
+
+async def revoke_token(session: AsyncSession, token: str):
+    """
+    Logs out the session a refresh token belongs to.
+    """
+    result = await session.exec(select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_token(token)))
+    family_id = result.first()
+    if family_id is not None:
+        await revoke_family(session, family_id)
+
+async def revoke_user_tokens(session: AsyncSession, user_id: uuid.UUID):
+    statement = (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await session.exec(statement)
+
+async def prune_expired_tokens(session: AsyncSession, user_id: uuid.UUID):
+    # Run at login so each user's rows stay bounded without a cleanup job
+    statement = delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at < datetime.utcnow())
+    await session.exec(statement.execution_options(synchronize_session=False))
@@ -0,0 +1,236 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlmodel import delete, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.database import engine
+from backend.models import RiskAssessment, RiskJob, RiskJobResult, RiskJobStatus
+from backend.services.ai_service import AIServiceError, analyze_vendor_risk
+from backend.services.risk_scoring import score_vendor
+from backend.services.vendor_features import build_vendor_data
+
+# Vendors analysed concurrently across all jobs in this worker
+RISK_WORKERS = int(os.environ.get("RISK_WORKERS", 4))
+RISK_MAX_ATTEMPTS = int(os.environ.get("RISK_MAX_ATTEMPTS", 3))
+RISK_RETRY_BASE_SECONDS = float(os.environ.get("RISK_RETRY_BASE_SECONDS", 0.5))
+# Vendors finished per job before their assessments, results and progress are written in one transaction
+RISK_WRITE_BATCH_SIZE = int(os.environ.get("RISK_WRITE_BATCH_SIZE", 50))
+# Finished jobs stay pollable this long before they are deleted
+RISK_JOB_RETENTION_DAYS = float(os.environ.get("RISK_JOB_RETENTION_DAYS", 7))
+
+RESULT_FIELDS = ("score", "level", "engine", "error")
+
+class RunningJob:
+    """
+    A job this worker is working through. Only the work queue lives here;
+    status, counts and results are written to RiskJob/RiskJobResult as the
+    job goes, which is what GET /risk/jobs/{id} reads on any worker.
+    """
+
+    def __init__(self, job_id: uuid.UUID, total: int, analyze_all: bool = False):
+        self.id = job_id
+        self.total = total
+        self.analyze_all = analyze_all
+        self.processed = 0
+        self.failed = 0
+        self.started = False
+        # Finished but not yet written: each vendor's result, with its assessment unless it failed
+        self.pending: List[Tuple[dict, Optional[RiskAssessment]]] = []
+        # Results already stored, i.e. the position of the next one
+        self.saved = 0
+        self.lock = asyncio.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.processed + self.failed >= self.total
+
+running: Dict[uuid.UUID, RunningJob] = {}
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+
+def _ensure_workers() -> asyncio.Queue:
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue()
+        for _ in range(RISK_WORKERS):
+            _workers.append(asyncio.create_task(_worker(_queue)))
+    return _queue
+
+def job_status(job: RiskJob, results: Sequence[RiskJobResult] = ()) -> RiskJobStatus:
+    return RiskJobStatus(
+        id=job.id,
+        status=job.status,
+        total=job.total,
+        processed=job.processed,
+        failed=job.failed,
+        results=[
+            {"vendor_id": str(result.vendor_id), **{
+                field: getattr(result, field) for field in RESULT_FIELDS if getattr(result, field) is not None
+            }}
+            for result in results
+        ],
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+async def submit_job(vendor_ids: List[uuid.UUID], analyze_all: bool = False) -> RiskJobStatus:
+    """
+    Records a new job and queues its vendors onto this worker's pool.
+    Vendors are scored locally; only borderline ones (or all, with
+    `analyze_all`) also go to the model.
+    """
+    job = RiskJob(total=len(vendor_ids))
+    if not vendor_ids:
+        job.status = "completed"
+        job.finished_at = job.created_at
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await _prune_history(session)
+        session.add(job)
+        await session.commit()
+
+    if vendor_ids:
+        run = running[job.id] = RunningJob(job.id, len(vendor_ids), analyze_all)
+        queue = _ensure_workers()
+        for vendor_id in vendor_ids:
+            queue.put_nowait((run, vendor_id))
+    return job_status(job)
+
+async def get_job(session: AsyncSession, job_id: uuid.UUID) -> Optional[RiskJobStatus]:
+    job = await session.get(RiskJob, job_id)
+    if job is None:
+        return None
+    statement = select(RiskJobResult).where(RiskJobResult.job_id == job_id).order_by(RiskJobResult.position)
+    result = await session.exec(statement)
+    return job_status(job, result.all())
+
+async def _prune_history(session: AsyncSession):
+    # Run on submit, so the tables stay bounded without a cleanup job
+    expired = select(RiskJob.id).where(RiskJob.finished_at < datetime.utcnow() - timedelta(days=RISK_JOB_RETENTION_DAYS))
+    await session.exec(delete(RiskJobResult).where(RiskJobResult.job_id.in_(expired)).execution_options(synchronize_session=False))
+    await session.exec(delete(RiskJob).where(RiskJob.id.in_(expired)).execution_options(synchronize_session=False))
+
+async def _worker(queue: asyncio.Queue):
+    while True:
+        job, vendor_id = await queue.get()
+        try:
+            await _process(job, vendor_id)
+        except Exception as e:
+            print(f"Risk job {job.id}: vendor {vendor_id} failed: {e}")
+            await _record(job, {"vendor_id": str(vendor_id), "error": str(e)}, None)
+        finally:
+            queue.task_done()
+
+async def _mark_running(job: RunningJob):
+    async with job.lock:
+        if job.started:
+            return
+        job.started = True
+        try:
+            async with AsyncSession(engine) as session:
+                await _update_job(session, job, "running")
+                await session.commit()
+        except Exception as e:
+            # The first batch written sets it anyway
+            print(f"Risk job {job.id}: failed to mark it running: {e}")
+
+async def _process(job: RunningJob, vendor_id: uuid.UUID):
+    if not job.started:
+        await _mark_running(job)
+    async with AsyncSession(engine) as session:
+        vendor_data = await build_vendor_data(session, vendor_id)
+
+    analysis_result = score_vendor(vendor_data)
+    engine_used = "local"
+    if job.analyze_all or analysis_result["borderline"]:
+        for attempt in range(RISK_MAX_ATTEMPTS):
+            try:
+                analysis_result = await analyze_vendor_risk(vendor_data, fail_open=False)
+                engine_used = "model"
+                break
+            except AIServiceError as e:
+                if attempt == RISK_MAX_ATTEMPTS - 1:
+                    # Keep the local score rather than failing the vendor
+                    print(f"Risk job {job.id}: model unavailable for {vendor_id}, keeping the local score: {e}")
+                    analysis_result["reasoning"] = "Model unavailable. " + analysis_result["reasoning"]
+                    break
+                await asyncio.sleep(RISK_RETRY_BASE_SECONDS * 2 ** attempt)
+
+    record = RiskAssessment(
+        vendor_id=vendor_id,
+        score=analysis_result.get("score", 0),
+        level=analysis_result.get("level", "Unknown"),
+        reasoning=analysis_result.get("reasoning", ""),
+        factors=analysis_result.get("factors", [])
+    )
+    await _record(job, {"vendor_id": str(vendor_id), "score": record.score, "level": record.level, "engine": engine_used}, record)
+
+async def _record(job: RunningJob, result: dict, record: Optional[RiskAssessment]):
+    async with job.lock:
+        if record is None:
+            job.failed += 1
+        else:
+            job.processed += 1
+        job.pending.append((result, record))
+        if len(job.pending) >= RISK_WRITE_BATCH_SIZE or job.done:
+            await _flush(job)
+
+async def _flush(job: RunningJob):
+    try:
+        await _write(job, job.pending)
+    except Exception as e:
+        # None of the batch was saved: those vendors failed after all
+        print(f"Risk job {job.id}: failed to save {len(job.pending)} results: {e}")
+        lost = [result for result, record in job.pending if record is not None]
+        for result in lost:
+            result.pop("score", None)
+            result.pop("level", None)
+            result["error"] = f"could not save the assessment: {e}"
+        job.processed -= len(lost)
+        job.failed += len(lost)
+        try:
+            await _write(job, [(result, None) for result, _ in job.pending])
+        except Exception as e:
+            # The counts go out with the next batch; these vendors' results are lost
+            print(f"Risk job {job.id}: failed to save progress: {e}")
+    job.pending = []
+    if job.done:
+        running.pop(job.id, None)
+
+async def _write(job: RunningJob, pending: List[Tuple[dict, Optional[RiskAssessment]]], status: Optional[str] = None):
+    async with AsyncSession(engine) as session:
+        session.add_all([record for _, record in pending if record is not None])
+        session.add_all([
+            RiskJobResult(
+                job_id=job.id, position=job.saved + i, vendor_id=uuid.UUID(result["vendor_id"]),
+                **{field: result.get(field) for field in RESULT_FIELDS},
+            )
+            for i, (result, _) in enumerate(pending)
+        ])
+        await _update_job(session, job, status or ("completed" if job.done else "running"))
+        await session.commit()
+    job.saved += len(pending)
+
+async def _update_job(session: AsyncSession, job: RunningJob, status: str):
+    now = datetime.utcnow()
+    statement = update(RiskJob).where(RiskJob.id == job.id).values(
+        status=status, processed=job.processed, failed=job.failed, updated_at=now,
+        finished_at=now if status != "running" else None,
+    )
+    await session.exec(statement.execution_options(synchronize_session=False))
+
+async def shutdown_risk_workers():
+    global _queue
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+    # Their queued vendors go with this process: save what finished and say so instead of leaving them "running"
+    for job in list(running.values()):
+        try:
+            await _write(job, job.pending, "interrupted")
+        except Exception as e:
+            print(f"Risk job {job.id}: failed to mark it interrupted: {e}")
+    running.clear()
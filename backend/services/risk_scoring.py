@@ -0,0 +1,230 @@
+import os
+import uuid
+from itertools import chain
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import InvoiceStatus, User, VendorStats
+from backend.services.vendor_stats import VOLUME_WINDOW_DAYS
+from backend.utils.cache import TTLCache
+
+if TYPE_CHECKING:
+    # NumPy is imported with the first score, keeping it out of worker boot
+    import numpy as np
+
+# Scores at or above these are Low / Medium risk (higher is safer, as with the model)
+RISK_LOW_THRESHOLD = float(os.environ.get("RISK_LOW_THRESHOLD", 70))
+RISK_MEDIUM_THRESHOLD = float(os.environ.get("RISK_MEDIUM_THRESHOLD", 40))
+# Scores this close to a level boundary, or vendors with fewer invoices than
+# RISK_MIN_INVOICES, are borderline: batch jobs send those on to the model
+RISK_BORDERLINE_MARGIN = float(os.environ.get("RISK_BORDERLINE_MARGIN", 5))
+RISK_MIN_INVOICES = int(os.environ.get("RISK_MIN_INVOICES", 5))
+RISK_PORTFOLIO_CACHE_TTL_SECONDS = float(os.environ.get("RISK_PORTFOLIO_CACHE_TTL_SECONDS", 60))
+
+# Columns of the feature matrix, in order
+FEATURES = (
+    "invoice_count", "rejected_count", "paid_count", "late_count",
+    "avg_days_to_paid", "volume_30d", "volume_90d", "history_years",
+)
+(INVOICE_COUNT, REJECTED_COUNT, PAID_COUNT, LATE_COUNT,
+ AVG_DAYS_TO_PAID, VOLUME_30D, VOLUME_90D, HISTORY_YEARS) = range(len(FEATURES))
+
+# Factor label -> most points it can move the score either way; impacts are reported scaled by it to [-1, 1]
+FACTORS = {
+    "Trading history": 10,
+    "Transaction frequency": 10,
+    "Payment punctuality": 25,
+    "Rejected invoices": 30,
+    "Days to payment": 10,
+    "Recent volume trend": 10,
+}
+LEVELS = ("High", "Medium", "Low")
+
+portfolio_cache = TTLCache(maxsize=1, ttl=RISK_PORTFOLIO_CACHE_TTL_SECONDS)
+
+def feature_row(vendor_data: Dict) -> List[float]:
+    """
+    One matrix row from build_vendor_data's features, for scoring a single vendor.
+    """
+    avg_days = vendor_data["avg_days_to_paid"]
+    return [
+        vendor_data["invoice_count"],
+        vendor_data["status_counts"].get(InvoiceStatus.REJECTED.value, 0),
+        vendor_data["status_counts"].get(InvoiceStatus.PAID.value, 0),
+        vendor_data["late_payments"],
+        float("nan") if avg_days is None else avg_days,
+        vendor_data["volume_30d"],
+        vendor_data["volume_90d"],
+        vendor_data["history_years"],
+    ]
+
+def factor_points(features: "np.ndarray") -> "np.ndarray":
+    """
+    Signed score points per vendor (rows) and factor (columns, as FACTORS),
+    computed for the whole matrix at once.
+    """
+    import numpy as np
+    count = features[:, INVOICE_COUNT]
+    paid = features[:, PAID_COUNT]
+    zeros = np.zeros(len(features))
+    points = np.empty((len(features), len(FACTORS)))
+
+    # Young or barely active vendors start slightly negative
+    points[:, 0] = 15 * np.minimum(features[:, HISTORY_YEARS] / 3, 1) - 5
+    points[:, 1] = 15 * np.minimum(np.log1p(count) / np.log1p(200), 1) - 5
+
+    # Payment behaviour only counts in proportion to how many invoices were paid
+    confidence = paid / (paid + 5)
+    late_share = np.divide(features[:, LATE_COUNT], paid, out=zeros.copy(), where=paid > 0)
+    points[:, 2] = confidence * (10 - 35 * late_share)
+    points[:, 3] = -30 * np.divide(features[:, REJECTED_COUNT], count, out=zeros.copy(), where=count > 0)
+    days = features[:, AVG_DAYS_TO_PAID]
+    slowness = np.clip((np.nan_to_num(days) - 30) / 90, 0, 1)
+    points[:, 4] = np.where(np.isnan(days), 0, confidence * (5 - 15 * slowness))
+
+    # Last 30 days against the monthly average of the volume window; no recent volume at all is a warning
+    monthly = features[:, VOLUME_90D] / (VOLUME_WINDOW_DAYS / 30)
+    trend = np.divide(features[:, VOLUME_30D], monthly, out=zeros.copy(), where=monthly > 0)
+    points[:, 5] = np.where(monthly > 0, 10 * np.clip(trend - 1, -1, 0.5), np.where(count > 0, -10, 0))
+    return points
+
+class ScoredVendors:
+    """
+    Local scores for a set of vendors, as parallel arrays. Per-vendor dicts
+    are only built for the rows a caller asks for.
+    """
+
+    def __init__(self, vendor_ids: Sequence[uuid.UUID], features: "np.ndarray", names: Optional[Sequence[Optional[str]]] = None):
+        import numpy as np
+        self.vendor_ids = vendor_ids
+        self.names = names
+        self.invoice_counts = features[:, INVOICE_COUNT]
+        self.points = factor_points(features)
+        self.scores = np.clip(np.rint(50 + self.points.sum(axis=1)), 0, 100)
+        # 0 = High, 1 = Medium, 2 = Low risk
+        self.levels = (self.scores >= RISK_MEDIUM_THRESHOLD).astype(np.int8) + (self.scores >= RISK_LOW_THRESHOLD)
+        self.borderline = (
+            (np.abs(self.scores - RISK_LOW_THRESHOLD) < RISK_BORDERLINE_MARGIN)
+            | (np.abs(self.scores - RISK_MEDIUM_THRESHOLD) < RISK_BORDERLINE_MARGIN)
+            | (self.invoice_counts < RISK_MIN_INVOICES)
+        )
+        self.generated_at = datetime.utcnow()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def factors(self, i: int) -> List[Dict]:
+        factors = [
+            {"label": label, "impact": round(max(-1.0, min(1.0, points / scale)), 2)}
+            for (label, scale), points in zip(FACTORS.items(), self.points[i].tolist())
+        ]
+        factors = [factor for factor in factors if factor["impact"]]
+        factors.sort(key=lambda factor: abs(factor["impact"]), reverse=True)
+        return factors
+
+    def verdict(self, i: int) -> Dict:
+        """
+        Same shape as analyze_vendor_risk's result, plus `borderline`.
+        """
+        factors = self.factors(i)
+        drivers = ", ".join(factor["label"].lower() for factor in factors[:2]) or "no invoice history"
+        return {
+            "score": int(self.scores[i]),
+            "level": LEVELS[self.levels[i]],
+            "reasoning": f"Scored from invoice history; mainly {drivers}.",
+            "factors": factors,
+            "borderline": bool(self.borderline[i]),
+        }
+
+    def entry(self, i: int) -> Dict:
+        return {
+            "vendor_id": self.vendor_ids[i],
+            "company_name": self.names[i] if self.names is not None else None,
+            "invoice_count": int(self.invoice_counts[i]),
+            **self.verdict(i),
+        }
+
+def score_vendor(vendor_data: Dict) -> Dict:
+    """
+    Local verdict for one vendor from build_vendor_data's features.
+    """
+    import numpy as np
+    scored = ScoredVendors([vendor_data["id"]], np.array([feature_row(vendor_data)], dtype=float))
+    return scored.verdict(0)
+
+def portfolio_features(rows: Sequence, now: datetime) -> "np.ndarray":
+    """
+    Feature matrix for VendorStats rows, with the same values (rounded the
+    same way) as vendor_features() builds for a single vendor.
+    """
+    import numpy as np
+    since_30 = (now - timedelta(days=30)).date().isoformat()
+    since_90 = (now - timedelta(days=VOLUME_WINDOW_DAYS)).date().isoformat()
+    features = np.empty((len(rows), len(FEATURES)))
+    features[:, INVOICE_COUNT] = [row.invoice_count for row in rows]
+    features[:, REJECTED_COUNT] = [row.status_counts.get(InvoiceStatus.REJECTED.value, 0) for row in rows]
+    features[:, PAID_COUNT] = [row.status_counts.get(InvoiceStatus.PAID.value, 0) for row in rows]
+    features[:, LATE_COUNT] = [row.paid_late_count for row in rows]
+    paid_days_total = np.array([row.paid_days_total for row in rows], dtype=float)
+    paid_days_count = np.array([row.paid_days_count for row in rows], dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        features[:, AVG_DAYS_TO_PAID] = np.where(paid_days_count > 0, np.round(paid_days_total / paid_days_count, 1), np.nan)
+
+    # Every (day, amount) of every vendor flattened into two arrays, so both windows are summed in bulk
+    days = np.fromiter(chain.from_iterable(row.daily_volume for row in rows), dtype="U10")
+    amounts = np.fromiter(chain.from_iterable(row.daily_volume.values() for row in rows), dtype=float)
+    owners = np.repeat(np.arange(len(rows)), [len(row.daily_volume) for row in rows])
+    for column, since in ((VOLUME_30D, since_30), (VOLUME_90D, since_90)):
+        volume = np.bincount(owners, weights=np.where(days >= since, amounts, 0), minlength=len(rows))
+        features[:, column] = np.round(volume, 2)
+
+    history_days = np.array([(now - row.first_invoice_at).days if row.first_invoice_at else 0 for row in rows], dtype=float)
+    features[:, HISTORY_YEARS] = np.round(history_days / 365, 1)
+    return features
+
+async def score_portfolio(session: AsyncSession, now: Optional[datetime] = None) -> ScoredVendors:
+    """
+    Scores every vendor with a stats row (i.e. at least one invoice) in one
+    pass over VendorStats, without touching the invoice table.
+    """
+    statement = select(
+        VendorStats.vendor_id, User.company_name, VendorStats.invoice_count, VendorStats.status_counts,
+        VendorStats.paid_late_count, VendorStats.paid_days_total, VendorStats.paid_days_count,
+        VendorStats.daily_volume, VendorStats.first_invoice_at,
+    ).join(User, User.id == VendorStats.vendor_id)
+    result = await session.exec(statement)
+    rows = result.all()
+    features = portfolio_features(rows, now or datetime.utcnow())
+    return ScoredVendors([row.vendor_id for row in rows], features, [row.company_name for row in rows])
+
+async def get_scored_portfolio(session: AsyncSession) -> ScoredVendors:
+    scored = portfolio_cache.get("portfolio")
+    if scored is None:
+        scored = await score_portfolio(session)
+        portfolio_cache.set("portfolio", scored)
+    return scored
+
+def portfolio_page(scored: ScoredVendors, level: Optional[str], borderline: Optional[bool], limit: int, offset: int) -> Dict:
+    """
+    Portfolio totals plus one page of vendors matching the filters, riskiest first.
+    """
+    import numpy as np
+    mask = np.ones(len(scored), dtype=bool)
+    if level is not None:
+        mask &= scored.levels == LEVELS.index(level)
+    if borderline is not None:
+        mask &= scored.borderline == borderline
+    matching = np.flatnonzero(mask)
+    # Stable, so vendors with equal scores keep their order from page to page
+    ordered = matching[np.argsort(scored.scores[matching], kind="stable")]
+    counts = np.bincount(scored.levels, minlength=len(LEVELS))
+    return {
+        "vendor_count": len(scored),
+        "level_counts": {name: int(count) for name, count in zip(LEVELS, counts)},
+        "borderline_count": int(scored.borderline.sum()),
+        "average_score": round(float(scored.scores.mean()), 1) if len(scored) else None,
+        "total": len(ordered),
+        "vendors": [scored.entry(i) for i in ordered[offset:offset + limit].tolist()],
+        "generated_at": scored.generated_at,
+    }
@@ -0,0 +1,12 @@
+import uuid
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import VendorStats
+from backend.services.vendor_stats import vendor_features
+
+async def build_vendor_data(session: AsyncSession, vendor_id: uuid.UUID) -> dict:
+    """
+    Collects the feature data sent to the risk model for one vendor.
+    Reads the incrementally maintained stats row, never the raw invoices.
+    """
+    stats = await session.get(VendorStats, vendor_id)
+    return {"id": str(vendor_id), **vendor_features(stats)}
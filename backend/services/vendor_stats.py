@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Mapping, Optional
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.models import Invoice, InvoiceStatus, VendorStats
+
+# Longest window reported from daily_volume
+VOLUME_WINDOW_DAYS = 90
+
+def _bump(counter: dict, key: str, delta: float) -> dict:
+    # JSON columns only persist when reassigned, so always return a new dict
+    updated = dict(counter)
+    updated[key] = updated.get(key, 0) + delta
+    return updated
+
+def _trim_volume(daily_volume: dict, now: datetime) -> dict:
+    oldest = (now - timedelta(days=VOLUME_WINDOW_DAYS)).date().isoformat()
+    return {day: amount for day, amount in daily_volume.items() if day >= oldest}
+
+def apply_created(stats: VendorStats, invoice: Invoice, now: Optional[datetime] = None):
+    apply_created_rows(stats, [invoice.model_dump()], now)
+
+def apply_created_rows(stats: VendorStats, rows: List[Mapping], now: Optional[datetime] = None):
+    """
+    Folds new invoice rows (column name -> value) into the stats, reassigning
+    each JSON column once per batch rather than once per invoice.
+    """
+    now = now or datetime.utcnow()
+    status_counts = dict(stats.status_counts)
+    status_amounts = dict(stats.status_amounts)
+    daily_volume = dict(stats.daily_volume)
+    total_amount = stats.total_amount
+    first_invoice_at, last_invoice_at = stats.first_invoice_at, stats.last_invoice_at
+    for row in rows:
+        status = InvoiceStatus(row["status"]).value
+        amount, created_at = row["amount"], row["created_at"]
+        day = created_at.date().isoformat()
+        total_amount += amount
+        status_counts[status] = status_counts.get(status, 0) + 1
+        status_amounts[status] = status_amounts.get(status, 0) + amount
+        daily_volume[day] = daily_volume.get(day, 0) + amount
+        if first_invoice_at is None or created_at < first_invoice_at:
+            first_invoice_at = created_at
+        if last_invoice_at is None or created_at > last_invoice_at:
+            last_invoice_at = created_at
+    stats.invoice_count += len(rows)
+    stats.total_amount = total_amount
+    stats.first_invoice_at, stats.last_invoice_at = first_invoice_at, last_invoice_at
+    stats.status_counts = status_counts
+    stats.status_amounts = status_amounts
+    stats.daily_volume = _trim_volume(daily_volume, now)
+    stats.updated_at = now
+
+def apply_paid(stats: VendorStats, invoice: Invoice, paid_at: datetime):
+    stats.paid_days_total += (paid_at - invoice.created_at).total_seconds() / 86400
+    stats.paid_days_count += 1
+    if paid_at > invoice.due_date:
+        stats.paid_late_count += 1
+
+def apply_status_change(stats: VendorStats, invoice: Invoice, old_status: InvoiceStatus, new_status: InvoiceStatus, changed_at: datetime):
+    old, new = InvoiceStatus(old_status).value, InvoiceStatus(new_status).value
+    stats.status_counts = _bump(_bump(stats.status_counts, old, -1), new, 1)
+    stats.status_amounts = _bump(_bump(stats.status_amounts, old, -invoice.amount), new, invoice.amount)
+    if new_status == InvoiceStatus.PAID:
+        apply_paid(stats, invoice, changed_at)
+    stats.daily_volume = _trim_volume(stats.daily_volume, changed_at)
+    stats.updated_at = changed_at
+
+async def _lock_stats(session: AsyncSession, vendor_id: uuid.UUID) -> VendorStats:
+    """
+    Returns the vendor's stats row inside the caller's transaction, creating
+    it if needed and locking it (FOR UPDATE where supported) against races.
+    """
+    dialect = session.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        empty = VendorStats(vendor_id=vendor_id).model_dump()
+        await session.exec(insert(VendorStats).values(**empty).on_conflict_do_nothing())
+
+    statement = select(VendorStats).where(VendorStats.vendor_id == vendor_id).with_for_update()
+    result = await session.exec(statement)
+    stats = result.first()
+    if stats is None:
+        stats = VendorStats(vendor_id=vendor_id)
+        session.add(stats)
+    return stats
+
+async def record_invoice_created(session: AsyncSession, invoice: Invoice):
+    """
+    Folds a new invoice into its vendor's stats. Call before committing the invoice.
+    """
+    await record_invoice_rows_created(session, [invoice.model_dump()])
+
+async def record_invoice_rows_created(session: AsyncSession, rows: List[Mapping]):
+    """
+    Bulk form of record_invoice_created for rows inserted without ORM objects;
+    locks each vendor's stats row once per batch.
+    """
+    by_vendor: Dict[uuid.UUID, List[Mapping]] = {}
+    for row in rows:
+        by_vendor.setdefault(row["vendor_id"], []).append(row)
+
+    now = datetime.utcnow()
+    for vendor_id, vendor_rows in by_vendor.items():
+        stats = await _lock_stats(session, vendor_id)
+        apply_created_rows(stats, vendor_rows, now)
+        session.add(stats)
+
+async def record_status_change(session: AsyncSession, invoice: Invoice, old_status: InvoiceStatus, changed_at: Optional[datetime] = None):
+    """
+    Moves an invoice between status buckets. Call in the transaction that changes it.
+    """
+    await record_status_changes(session, [invoice], old_status, changed_at)
+
+async def record_status_changes(session: AsyncSession, invoices: List, old_status: InvoiceStatus, changed_at: Optional[datetime] = None):
+    """
+    Bulk form of record_status_change for invoices (or rows with the same
+    attributes, e.g. from UPDATE ... RETURNING) that all left `old_status`;
+    locks each vendor's stats row once per batch.
+    """
+    changed_at = changed_at or datetime.utcnow()
+    by_vendor: Dict[uuid.UUID, List] = {}
+    for invoice in invoices:
+        if invoice.status != old_status:
+            by_vendor.setdefault(invoice.vendor_id, []).append(invoice)
+
+    for vendor_id, vendor_invoices in by_vendor.items():
+        stats = await _lock_stats(session, vendor_id)
+        for invoice in vendor_invoices:
+            apply_status_change(stats, invoice, old_status, invoice.status, changed_at)
+        session.add(stats)
+
+def vendor_features(stats: Optional[VendorStats], now: Optional[datetime] = None) -> Dict:
+    """
+    Flattens a stats row into the features used for risk scoring.
+    """
+    now = now or datetime.utcnow()
+    if stats is None:
+        stats = VendorStats(vendor_id=uuid.uuid4())
+    since_30 = (now - timedelta(days=30)).date().isoformat()
+    since_90 = (now - timedelta(days=VOLUME_WINDOW_DAYS)).date().isoformat()
+    return {
+        "invoice_count": stats.invoice_count,
+        "transaction_volume": round(stats.total_amount, 2),
+        "status_counts": {status.value: stats.status_counts.get(status.value, 0) for status in InvoiceStatus},
+        "status_amounts": {status.value: round(stats.status_amounts.get(status.value, 0), 2) for status in InvoiceStatus},
+        "late_payments": stats.paid_late_count,
+        "avg_days_to_paid": round(stats.paid_days_total / stats.paid_days_count, 1) if stats.paid_days_count else None,
+        "volume_30d": round(sum(amount for day, amount in stats.daily_volume.items() if day >= since_30), 2),
+        "volume_90d": round(sum(amount for day, amount in stats.daily_volume.items() if day >= since_90), 2),
+        "history_years": round((now - stats.first_invoice_at).days / 365, 1) if stats.first_invoice_at else 0,
+    }
+
+async def rebuild_vendor_stats(session: AsyncSession) -> int:
+    """
+    Recomputes every vendor's stats from the raw invoice table in one pass.
+    """
+    now = datetime.utcnow()
+    rebuilt: Dict[uuid.UUID, VendorStats] = {}
+    columns = select(Invoice.vendor_id, Invoice.amount, Invoice.status, Invoice.created_at, Invoice.due_date, Invoice.paid_at)
+    result = await session.stream(columns.execution_options(yield_per=5000))
+    async for partition in result.partitions():
+        # Folded per vendor per partition, so the JSON columns are copied once per batch, not per invoice
+        by_vendor: Dict[uuid.UUID, List] = {}
+        for row in partition:
+            by_vendor.setdefault(row.vendor_id, []).append(row)
+        for vendor_id, rows in by_vendor.items():
+            stats = rebuilt.get(vendor_id)
+            if stats is None:
+                stats = rebuilt[vendor_id] = VendorStats(
+                    vendor_id=vendor_id, status_counts={}, status_amounts={}, daily_volume={}
+                )
+            apply_created_rows(stats, [row._mapping for row in rows], now)
+            for row in rows:
+                if row.status == InvoiceStatus.PAID and row.paid_at is not None:
+                    apply_paid(stats, row, row.paid_at)
+
+    await session.exec(delete(VendorStats))
+    session.add_all(rebuilt.values())
+    await session.commit()
+    return len(rebuilt)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Maintain the per-vendor invoice statistics table.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    from backend.database import engine, init_db
+    await init_db()
+    async with AsyncSession(engine) as session:
+        count = await rebuild_vendor_stats(session)
+    print(f"Rebuilt statistics for {count} vendors.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
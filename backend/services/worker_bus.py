@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import uuid
+from typing import Callable, Dict, List, Optional
+
+# "postgres" (LISTEN/NOTIFY, works across hosts), "local" (Unix datagram
+# sockets, workers on one host), "off", or "auto": postgres when the primary
+# is Postgres, local when several workers share SQLite, otherwise off
+WORKER_BUS = os.environ.get("WORKER_BUS", "auto")
+# Shared by the workers of one deployment; defaults to a directory per database
+WORKER_BUS_SOCKET_DIR = os.environ.get("WORKER_BUS_SOCKET_DIR")
+WORKER_BUS_RECONNECT_SECONDS = float(os.environ.get("WORKER_BUS_RECONNECT_SECONDS", 2))
+
+PG_CHANNEL = "kaziflow_worker_bus"
+
+class WorkerBus:
+    """
+    Fans events out to every worker process: cache invalidations and
+    notifications for streams held by another worker. publish() applies an
+    event to this worker at once and forwards it to the others in the
+    background, so remote workers catch up within milliseconds rather than
+    atomically. When a transport may have lost messages (reconnect), each
+    topic's on_reset drops whatever it can no longer trust.
+    """
+
+    def __init__(self):
+        # Tells our own messages apart when the transport echoes them back; set
+        # in start(), so workers forked from one preloaded app don't share it
+        self.origin: Optional[str] = None
+        self.transport = None
+        self.sent = 0
+        self.received = 0
+        self.failed = 0
+        self._handlers: Dict[str, Callable[[List], None]] = {}
+        self._reset_handlers: List[Callable[[], None]] = []
+        self._outbox: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+
+    def subscribe(self, topic: str, handler: Callable[[List], None], on_reset: Optional[Callable[[], None]] = None):
+        self._handlers[topic] = handler
+        if on_reset is not None:
+            self._reset_handlers.append(on_reset)
+
+    def publish(self, topic: str, items: List):
+        """
+        Applies `items` to this worker's `topic` handler and queues them for
+        the others. Items must be JSON-serializable; call after committing.
+        """
+        if not items:
+            return
+        self._handlers[topic](items)
+        if self._outbox is not None:
+            self._outbox.put_nowait((topic, items))
+
+    def _receive(self, payload: str):
+        try:
+            message = json.loads(payload)
+            if message["origin"] == self.origin:
+                return
+            handler = self._handlers.get(message["topic"])
+            if handler is not None:
+                self.received += 1
+                handler(message["items"])
+        except Exception as e:
+            print(f"Worker bus: bad message: {type(e).__name__}: {e}")
+
+    def _reset(self):
+        for on_reset in self._reset_handlers:
+            on_reset()
+
+    def _payloads(self, topic: str, items: List) -> List[str]:
+        payload = json.dumps({"origin": self.origin, "topic": topic, "items": items}, default=str)
+        if len(payload) <= self.transport.max_payload or len(items) == 1:
+            return [payload]
+        middle = len(items) // 2
+        return self._payloads(topic, items[:middle]) + self._payloads(topic, items[middle:])
+
+    async def _send_loop(self):
+        while True:
+            topic, items = await self._outbox.get()
+            try:
+                for payload in self._payloads(topic, items):
+                    await self.transport.send(payload)
+                    self.sent += 1
+            except Exception as e:
+                # Other workers keep the stale entries until their TTL; nothing to retry against
+                self.failed += 1
+                print(f"Worker bus: failed to forward {topic}: {type(e).__name__}: {e}")
+
+    async def start(self, transport):
+        if transport is None or self.transport is not None:
+            return
+        self.origin = uuid.uuid4().hex
+        await transport.start(self._receive, self._reset)
+        self.transport = transport
+        self._outbox = asyncio.Queue()
+        self._sender = asyncio.create_task(self._send_loop())
+        print(f"Worker bus: {transport.name}")
+
+    async def stop(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        self._outbox = None
+        if self.transport is not None:
+            await self.transport.stop()
+            self.transport = None
+
+    def stats(self) -> dict:
+        return {
+            "transport": self.transport.name if self.transport is not None else None,
+            "sent": self.sent,
+            "received": self.received,
+            "failed": self.failed,
+        }
+
+class PostgresTransport:
+    """
+    LISTEN/NOTIFY on the primary over one dedicated connection per worker,
+    re-established with a reset when it drops.
+    """
+
+    name = "postgres"
+    # NOTIFY payloads are capped at 8000 bytes
+    max_payload = 7900
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._connection = None
+        self._watchdog: Optional[asyncio.Task] = None
+
+    async def _connect(self):
+        import asyncpg
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(PG_CHANNEL, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._receive(payload)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(WORKER_BUS_RECONNECT_SECONDS)
+            if self._connection is not None and not self._connection.is_closed():
+                continue
+            try:
+                await self._connect()
+            except Exception as e:
+                print(f"Worker bus: reconnect failed: {type(e).__name__}: {e}")
+                continue
+            # Anything sent while we weren't listening is gone
+            self._reset()
+
+    async def start(self, receive: Callable[[str], None], reset: Callable[[], None]):
+        self._receive = receive
+        self._reset = reset
+        await self._connect()
+        self._watchdog = asyncio.create_task(self._watch())
+
+    async def send(self, payload: str):
+        await self._connection.execute("SELECT pg_notify($1, $2)", PG_CHANNEL, payload)
+
+    async def stop(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+
+class LocalSocketTransport:
+    """
+    Stand-in for a broker when every worker runs on one host: each worker
+    binds a Unix datagram socket in a shared directory and sends to all the
+    others. Sockets of workers that are gone are cleaned up on send.
+    """
+
+    name = "local"
+    max_payload = 60000
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._socket: Optional[socket.socket] = None
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self._socket.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            self._receive(data.decode())
+
+    async def start(self, receive: Callable[[str], None], reset: Callable[[], None]):
+        self._receive = receive
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.path)
+        self._socket.setblocking(False)
+        asyncio.get_running_loop().add_reader(self._socket.fileno(), self._on_readable)
+
+    async def send(self, payload: str):
+        data = payload.encode()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".sock") or path == self.path:
+                continue
+            try:
+                self._socket.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Its worker exited without cleaning up
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                print(f"Worker bus: {name} is not keeping up, dropped a message")
+
+    async def stop(self):
+        if self._socket is not None:
+            asyncio.get_running_loop().remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+def transport_for(url, workers: int) -> Optional[object]:
+    """
+    Picks the transport for WORKER_BUS given the primary's SQLAlchemy URL
+    and the number of workers on this host.
+    """
+    choice = WORKER_BUS
+    if choice == "auto":
+        if url.get_backend_name() == "postgresql":
+            choice = "postgres"
+        elif workers > 1:
+            choice = "local"
+        else:
+            return None
+    if choice == "postgres":
+        return PostgresTransport(url.set(drivername="postgresql").render_as_string(hide_password=False))
+    if choice == "local":
+        if not hasattr(socket, "AF_UNIX"):
+            print("Worker bus: Unix sockets are not available; caches will not be shared")
+            return None
+        directory = WORKER_BUS_SOCKET_DIR or os.path.join(
+            tempfile.gettempdir(),
+            "kaziflow-bus-" + hashlib.sha1(url.render_as_string(hide_password=True).encode()).hexdigest()[:12],
+        )
+        return LocalSocketTransport(directory)
+    return None
+
+bus = WorkerBus()
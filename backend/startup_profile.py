@@ -0,0 +1,147 @@
+"""
+Worker cold-start profile: per-module import times and time to first request.
+
+Boots the app in a fresh interpreter under `python -X importtime`, runs its
+lifespan startup and serves one request, then reports where the time went.
+With --budget, exits non-zero when time to first request exceeds it, so a CI
+step can keep worker boot fast enough for autoscaling:
+
+    python start_backend.py --profile-startup --budget 2.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Marks phase boundaries in the importtime stream on stderr
+PHASE_MARKER = "--- kaziflow phase: "
+
+# Runs in the child. The request is driven straight through the ASGI
+# interface, so no HTTP client has to be imported alongside the app.
+PROBE = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+
+def phase(name):
+    sys.stderr.write(MARKER + name + "\n")
+    sys.stderr.flush()
+
+import backend.main
+imported = time.perf_counter()
+phase("startup")
+
+async def request(app, path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"startup-probe")], "client": ("127.0.0.1", 0), "server": ("startup-probe", 80),
+    }
+    statuses = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+    await app(scope, receive, send)
+    return statuses[0]
+
+async def main():
+    app = backend.main.app
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        phase("first request")
+        status = await request(app, PATH)
+        served = time.perf_counter()
+        phase("done")
+    print(json.dumps({
+        "import": imported - started,
+        "startup": ready - imported,
+        "first_request": served - ready,
+        "status": status,
+    }))
+
+asyncio.run(main())
+"""
+
+def parse_importtime(stderr: str) -> Dict[str, List[Tuple[str, int, int]]]:
+    """
+    Splits `-X importtime` output into phases of (module, self us, cumulative us).
+    """
+    phases: Dict[str, List[Tuple[str, int, int]]] = {"import": []}
+    current = phases["import"]
+    for line in stderr.splitlines():
+        if line.startswith(PHASE_MARKER):
+            current = phases.setdefault(line[len(PHASE_MARKER):], [])
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        current.append((name.strip(), int(self_us), int(cumulative_us)))
+    return phases
+
+def by_package(modules: List[Tuple[str, int, int]]) -> List[Tuple[str, int]]:
+    totals: Dict[str, int] = {}
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+def profile(path: str = "/") -> Tuple[dict, Dict[str, List[Tuple[str, int, int]]]]:
+    probe = f"MARKER = {PHASE_MARKER!r}\nPATH = {path!r}\n" + PROBE
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr[-4000:])
+        raise SystemExit(f"Startup probe failed with exit code {completed.returncode}")
+    # The app prints during startup; the timings are the last line
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(completed.stderr)
+
+def report(timings: dict, phases: Dict[str, List[Tuple[str, int, int]]], top: int):
+    imports = phases["import"]
+    print(f"Imported {len(imports)} modules for backend.main")
+    print("\nSlowest modules (self time, then including their imports):")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms {cumulative_us / 1000:8.1f} ms  {name}")
+    print("\nBy top-level package (self time):")
+    for package, self_us in by_package(imports)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    for phase in ("startup", "first request"):
+        late = phases.get(phase, [])
+        if late:
+            # Lazy imports that were still paid for before the first response
+            total = sum(self_us for _, self_us, _ in late)
+            print(f"\nImported during {phase}: {len(late)} modules, {total / 1000:.1f} ms")
+            for package, self_us in by_package(late)[:5]:
+                print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    total = timings["import"] + timings["startup"] + timings["first_request"]
+    print("\nPhases:")
+    print(f"  import backend.main {timings['import'] * 1000:8.1f} ms")
+    print(f"  lifespan startup    {timings['startup'] * 1000:8.1f} ms")
+    print(f"  first request       {timings['first_request'] * 1000:8.1f} ms  (HTTP {timings['status']})")
+    print(f"  time to first request {total * 1000:6.1f} ms")
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile how long a worker takes to serve its first request.")
+    parser.add_argument("--path", default="/", help="Path of the first request (default: /)")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    parser.add_argument("--budget", type=float, help="Exit 1 if time to first request exceeds this many seconds")
+    args = parser.parse_args(argv)
+
+    timings, phases = profile(args.path)
+    total = report(timings, phases, args.top)
+    if args.budget is not None and total > args.budget:
+        print(f"\nOver budget: {total:.2f}s > {args.budget:.2f}s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Runs every migration against an empty database and checks the result
+against the models, on SQLite and, when TEST_POSTGRES_URL is set, on
+Postgres (in a scratch schema that is dropped afterwards).
+
+    python -m pytest backend/tests
+    TEST_POSTGRES_URL=postgresql+asyncpg://postgres@localhost/kaziflow_test python -m pytest backend/tests
+"""
+import asyncio
+import os
+import uuid
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from backend.migrations import LATEST_VERSION, MIGRATIONS, SchemaOutOfDateError, current_version, upgrade, verify_schema
+from backend.migrations.__main__ import schema_drift
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL", "")
+
+async def check_migrations(engine):
+    assert await current_version(engine) == 0
+    with pytest.raises(SchemaOutOfDateError):
+        await verify_schema(engine)
+
+    assert await upgrade(engine) == [migration.VERSION for migration in MIGRATIONS]
+    await verify_schema(engine)
+    assert await current_version(engine) == LATEST_VERSION
+    async with engine.connect() as conn:
+        assert await conn.run_sync(schema_drift) == []
+
+    # Nothing left to apply the second time round
+    assert await upgrade(engine) == []
+    assert await current_version(engine) == LATEST_VERSION
+
+def test_migrations_sqlite(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrations.db'}", poolclass=NullPool)
+
+    async def run():
+        try:
+            await check_migrations(engine)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+def test_migrations_postgres():
+    schema = f"migrations_test_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(TEST_POSTGRES_URL, poolclass=NullPool)
+    engine = create_async_engine(
+        TEST_POSTGRES_URL, poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+
+    async def run():
+        async with admin.begin() as conn:
+            await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        try:
+            await check_migrations(engine)
+        finally:
+            await engine.dispose()
+            async with admin.begin() as conn:
+                await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+            await admin.dispose()
+
+    asyncio.run(run())
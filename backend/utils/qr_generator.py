@@ -1,20 +1,42 @@
-try:
-    import qrcode
-    QR_AVAILABLE = True
-except ImportError:
-    import logging
-    logging.error("qrcode library not found. QR code generation will be disabled.")
-    QR_AVAILABLE = False
-
+import asyncio
 import io
 import base64
+import os
+from backend.utils.cache import TTLCache
+from backend.utils.metrics import Histogram
+
+# Bump when the rendering parameters change so clients drop cached images
+QR_RENDER_VERSION = "1"
+QR_CACHE_MAX_ENTRIES = int(os.environ.get("QR_CACHE_MAX_ENTRIES", 2048))
+
+# Rendered PNGs never go stale, so entries only leave by LRU eviction
+qr_cache = TTLCache(maxsize=QR_CACHE_MAX_ENTRIES, ttl=None)
+QR_RENDER_SECONDS = Histogram("qr_render_duration_seconds", "Time to render one invoice QR PNG")
+
+FALLBACK_PNG = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg==") # 1x1 transparent pixel
+
+# The qrcode module once imported, False if it is missing; qrcode and Pillow load with the first render
+_qrcode = None
 
-def generate_invoice_qr(invoice_id: str) -> str:
+def _load_qrcode():
+    global _qrcode
+    if _qrcode is None:
+        try:
+            import qrcode
+            _qrcode = qrcode
+        except ImportError:
+            import logging
+            logging.error("qrcode library not found. QR code generation will be disabled.")
+            _qrcode = False
+    return _qrcode
+
+def render_invoice_qr_png(invoice_id: str) -> bytes:
     """
-    Generates a QR code for an invoice ID and returns it as a base64 string.
+    Renders the QR code for an invoice ID as PNG bytes.
     """
-    if not QR_AVAILABLE:
-        return "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg==" # 1x1 transparent pixel fallback
+    qrcode = _load_qrcode()
+    if not qrcode:
+        return FALLBACK_PNG
 
     qr = qrcode.QRCode(
         version=1,
@@ -29,6 +51,16 @@ def generate_invoice_qr(invoice_id: str) -> str:
     
     buffered = io.BytesIO()
     img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    
-    return f"data:image/png;base64,{img_str}"
+    return buffered.getvalue()
+
+async def get_invoice_qr_png(invoice_id: str) -> bytes:
+    """
+    Same as render_invoice_qr_png, but served from the bounded LRU when possible
+    and rendered on a worker thread so Pillow never blocks the event loop.
+    """
+    png = qr_cache.get(invoice_id)
+    if png is None:
+        with QR_RENDER_SECONDS.time():
+            png = await asyncio.to_thread(render_invoice_qr_png, invoice_id)
+        qr_cache.set(invoice_id, png)
+    return png
@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets, one per key: each holds up to `burst` tokens
+    and refills at `rate` per second. The least recently used buckets are
+    dropped beyond `max_keys`; those have mostly refilled anyway. Not shared
+    between worker processes, so the effective limit scales with workers.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.admitted = 0
+        self.rejected = 0
+        # key -> [tokens, last refill time]
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def acquire(self, key: Hashable, now: Optional[float] = None) -> float:
+        """
+        Takes a token for `key`. Returns 0 when admitted, otherwise the
+        seconds until a token will be available.
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.admitted += 1
+            return 0.0
+        self.rejected += 1
+        return (1 - bucket[0]) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "keys": len(self._buckets),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,39 @@
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Type
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from sqlmodel import SQLModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson is optional; without it responses use the stdlib encoder
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+def read_columns(table_model: Type[SQLModel], read_model: Type[SQLModel]) -> List:
+    """
+    Columns of `table_model` backing the fields of a lean read model. Selecting
+    these returns plain rows, skipping ORM object construction for list endpoints.
+    """
+    return [getattr(table_model, name) for name in read_model.model_fields]
+
+def _encode_default(value: Any) -> Any:
+    # asyncpg returns its own uuid.UUID subclass, which orjson only accepts exactly
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def rows_response(rows: Sequence, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Encodes rows selected with read_columns straight to JSON. orjson handles
+    UUIDs, datetimes and enums natively, so this skips the per-row model
+    validation FastAPI would run on a response_model; the column list keeps
+    the output shaped like the read model.
+    """
+    content = [row._asdict() for row in rows]
+    if orjson is None:
+        return JSONResponse(jsonable_encoder(content), headers=headers)
+    body = orjson.dumps(content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,437 @@
+"""
+Load test for the KaziFlow API.
+
+Seeds a database at a configurable scale, boots benchmarks.stub_app (the
+real app with a stubbed model) under uvicorn, drives a weighted mix of
+scenarios from concurrent clients and reports throughput and latency
+percentiles per route. Results are written as JSON and can be checked
+against a previous run:
+
+    python -m benchmarks.load_test --duration 30 --concurrency 32
+    python -m benchmarks.load_test --baseline benchmarks/results/before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PASSWORD = "bench-password-123"
+
+DEFAULT_MIX = {
+    "list_invoices": 35,
+    "poll_notifications": 25,
+    "create_invoice": 15,
+    "invoice_summary": 10,
+    "risk_analysis": 10,
+    "login": 5,
+}
+
+def vendor_email(i: int) -> str:
+    return f"bench-vendor-{i}@bench.local"
+
+def retailer_email(i: int) -> str:
+    return f"bench-retailer-{i}@bench.local"
+
+BANK_EMAIL = "bench-bank@bench.local"
+
+# --- Seeding ---------------------------------------------------------------
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+async def seed(args) -> Dict[str, List[uuid.UUID]]:
+    """
+    Creates the benchmark users, invoices and notifications with a fixed RNG
+    seed, so every run against a fresh database sees identical data.
+    """
+    from sqlalchemy import insert
+    from sqlmodel import select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from backend.auth import get_password_hash
+    from backend.database import engine
+    from backend.migrations import upgrade
+    from backend.models import Invoice, InvoiceStatus, Notification, User, UserRole
+    from backend.seed_data import reset_database
+    from backend.services.notifications import rebuild_unread_counters
+    from backend.services.vendor_stats import rebuild_vendor_stats
+
+    if args.reset:
+        await reset_database()
+    await upgrade(engine)
+
+    rng = random.Random(args.seed)
+    vendors = [_uuid(rng) for _ in range(args.vendors)]
+    retailers = [_uuid(rng) for _ in range(args.retailers)]
+    bank = _uuid(rng)
+
+    async with AsyncSession(engine) as session:
+        existing = await session.exec(select(User.id).where(User.email == BANK_EMAIL))
+        if existing.first() is not None:
+            print("Benchmark data already present; reusing it (pass --reset to reseed).")
+            await engine.dispose()
+            return {"vendors": vendors, "retailers": retailers}
+
+        started = time.perf_counter()
+        hashed = get_password_hash(BENCH_PASSWORD)
+        users = [
+            {"id": vendor_id, "email": vendor_email(i), "full_name": f"Bench Vendor {i}", "role": UserRole.VENDOR,
+             "company_name": f"Vendor Co {i}", "hashed_password": hashed}
+            for i, vendor_id in enumerate(vendors)
+        ] + [
+            {"id": retailer_id, "email": retailer_email(i), "full_name": f"Bench Retailer {i}", "role": UserRole.RETAILER,
+             "company_name": f"Retail Co {i}", "hashed_password": hashed}
+            for i, retailer_id in enumerate(retailers)
+        ] + [
+            {"id": bank, "email": BANK_EMAIL, "full_name": "Bench Bank", "role": UserRole.BANK,
+             "company_name": "Bench Bank", "hashed_password": hashed}
+        ]
+        await session.exec(insert(User.__table__), params=users)
+
+        now = datetime.utcnow()
+        statuses = list(InvoiceStatus)
+        batch: List[dict] = []
+        for vendor_id in vendors:
+            for _ in range(args.invoices_per_vendor):
+                created_at = now - timedelta(seconds=rng.randint(0, 180 * 86400))
+                batch.append({
+                    "id": _uuid(rng),
+                    "amount": round(rng.uniform(10_000, 5_000_000), 2),
+                    "description": f"Bench invoice {rng.randint(0, 10**6)}",
+                    "status": rng.choice(statuses),
+                    "due_date": created_at + timedelta(days=rng.randint(7, 90)),
+                    "created_at": created_at,
+                    "vendor_id": vendor_id,
+                    "retailer_id": rng.choice(retailers) if retailers else None,
+                    "is_verified": False,
+                })
+                if len(batch) >= 5000:
+                    await session.exec(insert(Invoice.__table__), params=batch)
+                    batch = []
+        if batch:
+            await session.exec(insert(Invoice.__table__), params=batch)
+
+        notifications = [
+            {"id": _uuid(rng), "user_id": user_id, "title": "Bench notification", "message": "Seeded for the load test",
+             "is_read": rng.random() < 0.5, "created_at": now - timedelta(minutes=rng.randint(0, 10_000))}
+            for user_id in vendors + retailers
+            for _ in range(args.notifications_per_user)
+        ]
+        if notifications:
+            await session.exec(insert(Notification.__table__), params=notifications)
+        await session.commit()
+
+        await rebuild_vendor_stats(session)
+        await rebuild_unread_counters(session)
+        print(f"Seeded {len(users)} users, {len(vendors) * args.invoices_per_vendor} invoices, "
+              f"{len(notifications)} notifications in {time.perf_counter() - started:.1f}s")
+
+    # The server runs in its own process and event loop
+    await engine.dispose()
+    return {"vendors": vendors, "retailers": retailers}
+
+# --- Server ----------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(args, port: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": args.database_url, "BENCH_MODEL_LATENCY_MS": str(args.model_latency_ms)}
+    # Every client shares one IP and a handful of users, so rate limits would measure themselves
+    env.setdefault("ADMISSION_CONTROL", "false")
+    command = [
+        sys.executable, "-m", "uvicorn", "benchmarks.stub_app:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+    ]
+    return subprocess.Popen(command, cwd=ROOT, env=env)
+
+async def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready in time")
+
+# --- Scenarios -------------------------------------------------------------
+
+class Context:
+    def __init__(self, seeded: Dict[str, List[uuid.UUID]], args):
+        self.args = args
+        self.vendor_ids = seeded["vendors"]
+        self.retailer_ids = seeded["retailers"]
+        self.vendor_tokens: List[str] = []
+        self.retailer_tokens: List[str] = []
+        self.bank_token: Optional[str] = None
+
+async def _login(client: httpx.AsyncClient, email: str) -> httpx.Response:
+    return await client.post("/auth/token", data={"username": email, "password": BENCH_PASSWORD})
+
+async def login_sessions(client: httpx.AsyncClient, ctx: Context):
+    async def token(email: str) -> str:
+        response = await _login(client, email)
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    sessions = ctx.args.sessions
+    ctx.vendor_tokens = await asyncio.gather(*(token(vendor_email(i)) for i in range(min(sessions, len(ctx.vendor_ids)))))
+    ctx.retailer_tokens = await asyncio.gather(*(token(retailer_email(i)) for i in range(min(sessions, len(ctx.retailer_ids)))))
+    ctx.bank_token = await token(BANK_EMAIL)
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+# Each scenario issues one request and returns (route label, response)
+Scenario = Callable[[httpx.AsyncClient, Context, random.Random], Awaitable[Tuple[str, httpx.Response]]]
+
+async def scenario_login(client, ctx, rng):
+    return "POST /auth/token", await _login(client, vendor_email(rng.randrange(len(ctx.vendor_ids))))
+
+async def scenario_list_invoices(client, ctx, rng):
+    token = rng.choice(ctx.vendor_tokens + ctx.retailer_tokens + [ctx.bank_token])
+    return "GET /invoices/", await client.get("/invoices/", params={"limit": 50}, headers=_auth(token))
+
+async def scenario_create_invoice(client, ctx, rng):
+    payload = {
+        "amount": round(rng.uniform(10_000, 5_000_000), 2),
+        "description": "Load test invoice",
+        "due_date": (datetime.utcnow() + timedelta(days=rng.randint(7, 90))).isoformat(),
+        "retailer_id": str(rng.choice(ctx.retailer_ids)) if ctx.retailer_ids else None,
+    }
+    return "POST /invoices/", await client.post("/invoices/", json=payload, headers=_auth(rng.choice(ctx.vendor_tokens)))
+
+async def scenario_poll_notifications(client, ctx, rng):
+    token = rng.choice(ctx.vendor_tokens + ctx.retailer_tokens)
+    return "GET /notifications/unread-count", await client.get("/notifications/unread-count", headers=_auth(token))
+
+async def scenario_invoice_summary(client, ctx, rng):
+    token = rng.choice(ctx.vendor_tokens + ctx.retailer_tokens + [ctx.bank_token])
+    return "GET /invoices/summary", await client.get("/invoices/summary", headers=_auth(token))
+
+async def scenario_risk_analysis(client, ctx, rng):
+    vendor_id = rng.choice(ctx.vendor_ids)
+    return "POST /risk/analyze/{vendor_id}", await client.post(f"/risk/analyze/{vendor_id}", headers=_auth(ctx.bank_token))
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": scenario_login,
+    "list_invoices": scenario_list_invoices,
+    "create_invoice": scenario_create_invoice,
+    "poll_notifications": scenario_poll_notifications,
+    "invoice_summary": scenario_invoice_summary,
+    "risk_analysis": scenario_risk_analysis,
+}
+
+# --- Load generation and reporting -----------------------------------------
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+async def run_load(base_url: str, ctx: Context, mix: Dict[str, int]) -> Tuple[Dict[str, dict], float]:
+    args = ctx.args
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    routes: Dict[str, str] = {}
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await login_sessions(client, ctx)
+
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        deadline = measure_from + args.duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(args.seed * 1000 + worker_id)
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                name = rng.choices(names, weights)[0]
+                request_started = time.perf_counter()
+                try:
+                    route, response = await SCENARIOS[name](client, ctx, rng)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    route, ok = routes.get(name, name), False
+                elapsed = time.perf_counter() - request_started
+                if request_started < measure_from:
+                    continue
+                routes[name] = route
+                samples.setdefault(name, []).append(elapsed)
+                if not ok:
+                    errors[name] = errors.get(name, 0) + 1
+
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+
+    report: Dict[str, dict] = {}
+    for name, values in sorted(samples.items()):
+        values.sort()
+        report[name] = {
+            "route": routes[name],
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "rps": round(len(values) / args.duration, 2),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    total_requests = sum(len(values) for values in samples.values())
+    return report, round(total_requests / args.duration, 2)
+
+def print_report(report: Dict[str, dict], total_rps: float):
+    header = f"{'scenario':<20} {'route':<32} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in report.items():
+        print(f"{name:<20} {row['route']:<32} {row['requests']:>7} {row['errors']:>5} {row['rps']:>8} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+    print(f"Total throughput: {total_rps} req/s")
+
+def compare(report: Dict[str, dict], baseline: dict, max_regression: float) -> List[str]:
+    """
+    Lists scenarios whose p95 grew, or throughput fell, by more than
+    max_regression (a fraction) relative to the baseline run.
+    """
+    failures = []
+    for name, row in report.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        if before["p95_ms"] and row["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {before['p95_ms']}ms -> {row['p95_ms']}ms")
+        if before["rps"] and row["rps"] < before["rps"] * (1 - max_regression):
+            failures.append(f"{name}: throughput {before['rps']} -> {row['rps']} req/s")
+    return failures
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'; choose from {', '.join(SCENARIOS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a database, boot the API and run a weighted load test.")
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file in the temp directory")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables before seeding")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for data and request mix")
+    parser.add_argument("--vendors", type=int, default=50)
+    parser.add_argument("--retailers", type=int, default=10)
+    parser.add_argument("--invoices-per-vendor", type=int, default=200)
+    parser.add_argument("--notifications-per-user", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--sessions", type=int, default=10, help="Logged-in vendors/retailers to spread requests over")
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of load discarded before measuring")
+    parser.add_argument("--model-latency-ms", type=float, default=200, help="Latency of the stubbed model")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. list_invoices=50,create_invoice=10")
+    parser.add_argument("--output", help="Result JSON path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Previous result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed p95/throughput regression vs the baseline, as a fraction")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    return parser.parse_args(argv)
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.database_url is None:
+        path = os.path.join(tempfile.gettempdir(), "kaziflow-bench.db")
+        if os.path.exists(path):
+            os.remove(path)
+        args.database_url = f"sqlite+aiosqlite:///{path}"
+    # backend.database reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.path.insert(0, ROOT)
+
+    seeded = await seed(args)
+    ctx = Context(seeded, args)
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(args, port)
+    try:
+        await wait_until_ready(base_url, server)
+        print(f"Running {args.duration:.0f}s at concurrency {args.concurrency} against {base_url} ({args.workers} worker(s))")
+        report, total_rps = await run_load(base_url, ctx, args.mix)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    print_report(report, total_rps)
+    result = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": args.database_url.split(":", 1)[0],
+            "config": {key: value for key, value in vars(args).items() if key not in ("database_url", "output", "baseline")},
+        },
+        "total_rps": total_rps,
+        "scenarios": report,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{datetime.utcnow():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    failures = [
+        f"{name}: error rate {row['errors'] / row['requests']:.1%}"
+        for name, row in report.items()
+        if row["requests"] and row["errors"] / row["requests"] > args.max_error_rate
+    ]
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(report, json.load(f), args.max_regression)
+    if failures:
+        print("Regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,118 @@
+"""
+Micro-benchmark of the local risk scorer over a synthetic vendor portfolio.
+
+Builds stats rows with a fixed RNG seed and times each stage of
+GET /risk/portfolio apart from the database read:
+
+    features  VendorStats rows -> feature matrix (portfolio_features)
+    score     factor points, scores, levels and borderline flags for every vendor (ScoredVendors)
+    page      totals plus the 100 riskiest vendors as response dicts (portfolio_page)
+    per-row   score_vendor one vendor at a time, the shape of the old per-vendor path, on a sample
+
+    python -m benchmarks.risk_scoring --vendors 100000 --repeat 5 --budget 1
+"""
+import argparse
+import random
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+
+from backend.models import InvoiceStatus
+from backend.services.risk_scoring import ScoredVendors, portfolio_features, portfolio_page, score_vendor
+from backend.services.vendor_stats import VOLUME_WINDOW_DAYS
+
+StatsRow = namedtuple("StatsRow", (
+    "vendor_id", "company_name", "invoice_count", "status_counts", "paid_late_count",
+    "paid_days_total", "paid_days_count", "daily_volume", "first_invoice_at",
+))
+
+def build_rows(vendors: int, active_days: int, now: datetime, seed: int = 1) -> List[StatsRow]:
+    rng = random.Random(seed)
+    statuses = [status.value for status in InvoiceStatus]
+    days = [(now - timedelta(days=offset)).date().isoformat() for offset in range(VOLUME_WINDOW_DAYS)]
+    rows = []
+    for i in range(vendors):
+        count = int(rng.paretovariate(1.2) * 5)
+        status_counts = {status: 0 for status in statuses}
+        for _ in range(min(count, 50)):
+            status_counts[rng.choice(statuses)] += 1
+        scale = count / max(min(count, 50), 1)
+        status_counts = {status: int(n * scale) for status, n in status_counts.items()}
+        paid = status_counts[InvoiceStatus.PAID.value]
+        rows.append(StatsRow(
+            vendor_id=uuid.UUID(int=rng.getrandbits(128)),
+            company_name=f"Vendor {i}",
+            invoice_count=count,
+            status_counts=status_counts,
+            paid_late_count=int(paid * rng.random() * 0.5),
+            paid_days_total=paid * rng.uniform(5, 120),
+            paid_days_count=paid,
+            daily_volume={day: rng.uniform(10_000, 2_000_000) for day in rng.sample(days, rng.randint(0, active_days))},
+            first_invoice_at=now - timedelta(days=rng.randint(1, 2000)),
+        ))
+    return rows
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def vendor_data(row: StatsRow, features, i: int) -> dict:
+    # build_vendor_data's shape, rebuilt from the matrix so the sample skips the database
+    avg_days = features[i, 4]
+    return {
+        "id": str(row.vendor_id),
+        "invoice_count": row.invoice_count,
+        "status_counts": row.status_counts,
+        "late_payments": row.paid_late_count,
+        "avg_days_to_paid": None if avg_days != avg_days else float(avg_days),
+        "volume_30d": float(features[i, 5]),
+        "volume_90d": float(features[i, 6]),
+        "history_years": float(features[i, 7]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the vectorized portfolio risk scorer.")
+    parser.add_argument("--vendors", type=int, default=100_000)
+    parser.add_argument("--active-days", type=int, default=20, help="Most days with volume per vendor in the 90-day window")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage; the best is reported")
+    parser.add_argument("--sample", type=int, default=2000, help="Vendors scored one at a time for the per-row comparison")
+    parser.add_argument("--budget", type=float, help="Exit 1 if scoring the portfolio (features + score) takes longer, in seconds")
+    args = parser.parse_args()
+
+    now = datetime(2026, 1, 1)
+    started = time.perf_counter()
+    rows = build_rows(args.vendors, args.active_days, now)
+    print(f"Built {len(rows):,} vendor stats rows in {time.perf_counter() - started:.1f}s")
+
+    features_s, features = timed(lambda: portfolio_features(rows, now), args.repeat)
+    vendor_ids = [row.vendor_id for row in rows]
+    names = [row.company_name for row in rows]
+    score_s, scored = timed(lambda: ScoredVendors(vendor_ids, features, names), args.repeat)
+    page_s, page = timed(lambda: portfolio_page(scored, None, None, 100, 0), args.repeat)
+
+    sample = min(args.sample, len(rows))
+    samples = [vendor_data(rows[i], features, i) for i in range(sample)]
+    per_row_s, _ = timed(lambda: [score_vendor(data) for data in samples], 1)
+    per_row_total = per_row_s / sample * len(rows)
+
+    print(f"\n{'stage':<10} {'seconds':>9} {'vendors/s':>12}")
+    for stage, seconds in (("features", features_s), ("score", score_s), ("page", page_s)):
+        print(f"{stage:<10} {seconds:>9.4f} {len(rows) / seconds:>12,.0f}")
+    print(f"{'per-row':<10} {per_row_total:>9.4f} {len(rows) / per_row_total:>12,.0f}  (extrapolated from {sample:,})")
+
+    total = features_s + score_s
+    print(f"\nPortfolio of {len(rows):,}: {total:.3f}s to score, {total + page_s:.3f}s with the first page")
+    print(f"Levels: {page['level_counts']}, borderline: {page['borderline_count']:,}, mean score {page['average_score']}")
+    if args.budget is not None and total > args.budget:
+        print(f"Over budget: {total:.3f}s > {args.budget:.3f}s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Micro-benchmark of list-endpoint serialization cost per 1k rows.
+
+Each variant loads the rows from an in-memory SQLite database and encodes
+them to a response body the way a request handler would:
+
+    before  select(Invoice) ORM objects, response_model=List[Invoice], JSONResponse
+    lean    select(Invoice) ORM objects, response_model=List[InvoiceRead], FastJSONResponse
+    rows    column select (read_columns) encoded by rows_response, as the routers now do
+
+    python -m benchmarks.serialization --rows 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from backend.models import Invoice, InvoiceRead, InvoiceStatus, Notification, NotificationRead, User
+from backend.utils.responses import FastJSONResponse, read_columns, rows_response
+
+def build_database(rows: int):
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(1)
+    vendor_id = uuid.uuid4()
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.exec(insert(User.__table__).values(
+            id=vendor_id, email="bench@bench.local", full_name="Bench", role="VENDOR", hashed_password="x"
+        ))
+        session.exec(insert(Invoice.__table__), params=[{
+            "id": uuid.uuid4(),
+            "amount": round(rng.uniform(10_000, 5_000_000), 2),
+            "description": f"Invoice {i} for delivered goods",
+            "status": rng.choice(list(InvoiceStatus)),
+            "due_date": now + timedelta(days=rng.randint(1, 90)),
+            "created_at": now - timedelta(minutes=i),
+            "vendor_id": vendor_id,
+            "is_verified": False,
+        } for i in range(rows)])
+        session.exec(insert(Notification.__table__), params=[{
+            "id": uuid.uuid4(),
+            "user_id": vendor_id,
+            "title": "New invoice to verify",
+            "message": f"Vendor submitted invoice {i}.",
+            "is_read": False,
+            "created_at": now - timedelta(minutes=i),
+        } for i in range(rows)])
+        session.commit()
+    return engine
+
+def response_model_encoder(response_model, response_class):
+    # What FastAPI does for a handler returning objects under a response_model
+    field = create_model_field("Response", response_model, mode="serialization")
+
+    async def encode(rows) -> bytes:
+        content = await serialize_response(field=field, response_content=rows)
+        return response_class(content).body
+    return encode
+
+async def rows_encoder(rows) -> bytes:
+    return rows_response(rows).body
+
+async def measure(engine, statement, encode, repeat: int) -> dict:
+    load_seconds, encode_seconds = [], []
+    body = b""
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            rows = session.exec(statement).all()
+            loaded = time.perf_counter()
+            body = await encode(rows)
+            encoded = time.perf_counter()
+        load_seconds.append(loaded - started)
+        encode_seconds.append(encoded - loaded)
+    return {
+        "load_ms": round(min(load_seconds) * 1000, 2),
+        "serialize_ms": round(min(encode_seconds) * 1000, 2),
+        "total_ms": round((min(load_seconds) + min(encode_seconds)) * 1000, 2),
+        "bytes": len(body),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare list serialization paths per N rows.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20, help="Best of N runs is reported")
+    parser.add_argument("--output", help="Optional JSON result path")
+    args = parser.parse_args(argv)
+
+    engine = build_database(args.rows)
+    variants = {
+        "invoices": [
+            ("before", select(Invoice), response_model_encoder(List[Invoice], JSONResponse)),
+            ("lean", select(Invoice), response_model_encoder(List[InvoiceRead], FastJSONResponse)),
+            ("rows", select(*read_columns(Invoice, InvoiceRead)), rows_encoder),
+        ],
+        "notifications": [
+            ("before", select(Notification), response_model_encoder(List[Notification], JSONResponse)),
+            ("lean", select(Notification), response_model_encoder(List[NotificationRead], FastJSONResponse)),
+            ("rows", select(*read_columns(Notification, NotificationRead)), rows_encoder),
+        ],
+    }
+
+    results = {}
+    print(f"{'endpoint':<15} {'variant':<8} {'load ms':>9} {'serialize ms':>13} {'total ms':>9} {'speedup':>8}")
+    for endpoint, runs in variants.items():
+        results[endpoint] = {}
+        for name, statement, encode in runs:
+            results[endpoint][name] = asyncio.run(measure(engine, statement, encode, args.repeat))
+        baseline = results[endpoint]["before"]["total_ms"]
+        for name, row in results[endpoint].items():
+            speedup = baseline / row["total_ms"] if row["total_ms"] else 0
+            print(f"{endpoint:<15} {name:<8} {row['load_ms']:>9} {row['serialize_ms']:>13} {row['total_ms']:>9} {speedup:>7.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
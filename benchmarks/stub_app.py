@@ -0,0 +1,25 @@
+"""
+backend.main:app with the Gemini call replaced by a deterministic stub, so
+benchmark runs never reach the real API. Served by uvicorn in the load test.
+"""
+import asyncio
+import hashlib
+import os
+from backend.main import app
+from backend.services.ai_service import set_model_backend
+
+# Simulated model latency; the stub's verdict depends only on the prompt
+BENCH_MODEL_LATENCY_MS = float(os.environ.get("BENCH_MODEL_LATENCY_MS", 200))
+
+async def stub_model(prompt: str) -> dict:
+    await asyncio.sleep(BENCH_MODEL_LATENCY_MS / 1000)
+    score = int(hashlib.sha256(prompt.encode()).hexdigest()[:8], 16) % 101
+    level = "Low" if score >= 70 else "Medium" if score >= 40 else "High"
+    return {
+        "score": score,
+        "level": level,
+        "reasoning": "Benchmark stub verdict.",
+        "factors": [{"label": "Stub factor", "impact": score / 100}],
+    }
+
+set_model_backend(stub_model)
@@ -18,6 +18,7 @@ import {
   Clock
 } from 'lucide-react';
 import client from '../src/api/client';
+import { openNotificationStream } from '../src/api/notificationStream';
 
 interface SidebarItem {
   id: string;
@@ -38,23 +39,37 @@ const Layout: React.FC<LayoutProps> = ({ children, role, activePage, onRoleChang
   const [isSidebarOpen, setIsSidebarOpen] = useState(false);
   const [notifications, setNotifications] = useState<any[]>([]);
   const [showNotifications, setShowNotifications] = useState(false);
+  // Counted by the API: the list below only holds the most recent page
   const [unreadCount, setUnreadCount] = useState(0);
 
+  const fetchUnreadCount = async () => {
+    try {
+      const response = await client.get('/notifications/unread-count');
+      setUnreadCount(response.data.unread);
+    } catch (err) {
+      console.error('Failed to fetch unread count', err);
+    }
+  };
+
   const fetchNotifications = async () => {
     try {
       const response = await client.get('/notifications/');
       setNotifications(response.data);
-      setUnreadCount(response.data.filter((n: any) => !n.is_read).length);
     } catch (err) {
       console.error('Failed to fetch notifications', err);
     }
+    fetchUnreadCount();
   };
 
   React.useEffect(() => {
     if (role !== UserRole.PUBLIC) {
+      // New notifications are pushed by the server instead of polled
+      const stream = openNotificationStream((notification) => {
+        setNotifications((prev) => prev.some((n) => n.id === notification.id) ? prev : [notification, ...prev]);
+        fetchUnreadCount();
+      });
       fetchNotifications();
-      const interval = setInterval(fetchNotifications, 30000); // Poll every 30s
-      return () => clearInterval(interval);
+      return () => stream.close();
     }
   }, [role]);
 
@@ -67,6 +82,17 @@ const Layout: React.FC<LayoutProps> = ({ children, role, activePage, onRoleChang
     }
   };
 
+  const markAllAsRead = async () => {
+    if (notifications.length === 0) return;
+    try {
+      // Everything up to the newest notification shown; later arrivals stay unread
+      await client.post('/notifications/read', { before: notifications[0].created_at });
+      fetchNotifications();
+    } catch (err) {
+      console.error('Failed to mark notifications as read', err);
+    }
+  };
+
   const sidebarItems: SidebarItem[] = [
     { id: 'dashboard', icon: <LayoutDashboard size={20} />, label: 'Dashboard', role: [UserRole.VENDOR, UserRole.RETAILER, UserRole.BANK, UserRole.ADMIN] },
     { id: 'invoices', icon: <FileText size={20} />, label: 'Invoices', role: [UserRole.VENDOR, UserRole.RETAILER] },
@@ -166,7 +192,12 @@ const Layout: React.FC<LayoutProps> = ({ children, role, activePage, onRoleChang
                 <div className="absolute right-0 mt-2 w-80 bg-white rounded-2xl shadow-2xl border border-kaziflow-beigeDark overflow-hidden z-50 animate-in fade-in slide-in-from-top-2">
                   <div className="p-4 border-b border-kaziflow-beigeDark flex items-center justify-between bg-kaziflow-beige/30">
                     <h4 className="font-heading font-bold text-sm">Notifications</h4>
-                    {unreadCount > 0 && <span className="text-[10px] bg-red-500 text-white px-1.5 py-0.5 rounded-full font-bold">{unreadCount} New</span>}
+                    {unreadCount > 0 && (
+                      <div className="flex items-center gap-2">
+                        <span className="text-[10px] bg-red-500 text-white px-1.5 py-0.5 rounded-full font-bold">{unreadCount} New</span>
+                        <button onClick={markAllAsRead} className="text-[10px] font-bold text-kaziflow-blue hover:underline">Mark all read</button>
+                      </div>
+                    )}
                   </div>
                   <div className="max-h-96 overflow-y-auto">
                     {notifications.length === 0 ? (
@@ -17,4 +17,48 @@ client.interceptors.request.use((config) => {
   return config;
 });
 
+export const clearSession = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('role');
+  localStorage.removeItem('refresh_token');
+};
+
+// One refresh at a time: concurrent 401s wait for the same rotation
+let refreshing: Promise<string | null> | null = null;
+
+export const refreshAccessToken = (): Promise<string | null> => {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) return Promise.resolve(null);
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refresh_token', response.data.refresh_token);
+        return response.data.access_token as string;
+      })
+      .catch(() => {
+        clearSession();
+        return null;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
+// Expired access tokens are renewed with the refresh token instead of a new password login
+client.interceptors.response.use(undefined, async (error) => {
+  const config = error.config;
+  if (error.response?.status !== 401 || !config || config._retried || config.url?.startsWith('/auth/')) {
+    throw error;
+  }
+  const token = await refreshAccessToken();
+  if (!token) throw error;
+  config._retried = true;
+  config.headers.Authorization = `Bearer ${token}`;
+  return client(config);
+});
+
 export default client;
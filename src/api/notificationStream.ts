@@ -0,0 +1,64 @@
+import client, { refreshAccessToken } from './client';
+
+export interface NotificationStream {
+  close: () => void;
+}
+
+// Reads the server-sent events stream with fetch so the bearer token can be sent as a header.
+// On disconnect it reconnects with Last-Event-ID, and the server replays anything missed.
+export const openNotificationStream = (onNotification: (notification: any) => void): NotificationStream => {
+  const controller = new AbortController();
+  let lastEventId: string | null = null;
+  let retryDelay = 1000;
+
+  const run = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers: Record<string, string> = { Accept: 'text/event-stream' };
+        const token = localStorage.getItem('token');
+        if (token) headers.Authorization = `Bearer ${token}`;
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+
+        const response = await fetch(`${client.defaults.baseURL}/notifications/stream`, {
+          headers,
+          signal: controller.signal,
+        });
+        if (response.status === 401 && (await refreshAccessToken())) {
+          continue;
+        }
+        if (!response.ok || !response.body) {
+          throw new Error(`Notification stream failed with status ${response.status}`);
+        }
+        retryDelay = 1000;
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let boundary = buffer.indexOf('\n\n');
+          while (boundary !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let data = '';
+            for (const line of frame.split('\n')) {
+              if (line.startsWith('id: ')) lastEventId = line.slice(4);
+              else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (data) onNotification(JSON.parse(data));
+            boundary = buffer.indexOf('\n\n');
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return;
+        console.error('Notification stream interrupted', err);
+      }
+      await new Promise((resolve) => setTimeout(resolve, retryDelay));
+      retryDelay = Math.min(retryDelay * 2, 30000);
+    }
+  };
+
+  run();
+  return { close: () => controller.abort() };
+};
@@ -1,11 +1,11 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import client from '../api/client';
+import client, { clearSession } from '../api/client';
 import { UserRole } from '../../types';
 
 interface AuthContextType {
   user: any | null;
   token: string | null;
-  login: (token: string, role: string) => void;
+  login: (token: string, role: string, refreshToken?: string) => void;
   logout: () => void;
   isLoading: boolean;
 }
@@ -28,16 +28,21 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
     setIsLoading(false);
   }, [token]);
 
-  const login = (newToken: string, role: string) => {
+  const login = (newToken: string, role: string, refreshToken?: string) => {
     localStorage.setItem('token', newToken);
     localStorage.setItem('role', role);
+    if (refreshToken) localStorage.setItem('refresh_token', refreshToken);
     setToken(newToken);
     setUser({ role });
   };
 
   const logout = () => {
-    localStorage.removeItem('token');
-    localStorage.removeItem('role');
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      // Revoke server-side too; the local session ends either way
+      client.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+    }
+    clearSession();
     setToken(null);
     setUser(null);
   };
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 import uvicorn
@@ -13,6 +14,23 @@ try:
 except ImportError:
     print("python-dotenv not installed, skipping .env loading")
 
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+    # Report import and startup cost instead of serving; runs in a fresh interpreter
+    from backend.startup_profile import main as profile_startup
+    profile_startup([arg for arg in sys.argv[1:] if arg != "--profile-startup"])
+    sys.exit(0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the KaziFlow backend.")
+    parser.add_argument("--production", action="store_true", help="Serve with several preloaded workers instead of the auto-reloading dev server")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes in production mode (default: CPU count)")
+    parser.add_argument("--host", help="Interface to bind (default: 127.0.0.1, or 0.0.0.0 in production mode)")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    if args.production:
+        # Read by backend.database when it sizes connection pools, so set it before the import below
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+
 print(f"Starting KaziFlow Backend from: {current_dir}")
 print("Checking imports...")
 
@@ -23,6 +41,24 @@ except ImportError as e:
     print(f"Error importing backend: {e}")
     sys.exit(1)
 
+async def apply_migrations():
+    from backend.database import engine
+    from backend.migrations import upgrade
+    try:
+        return await upgrade(engine)
+    finally:
+        # No connection may outlive this event loop or be inherited by forked workers
+        await engine.dispose()
+
 if __name__ == "__main__":
-    # run uvicorn programmatically
-    uvicorn.run("backend.main:app", host="127.0.0.1", port=8000, reload=True)
+    # Apply pending schema migrations once, before any worker starts
+    import asyncio
+    applied = asyncio.run(apply_migrations())
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date.")
+
+    if args.production:
+        from backend.server import run
+        run(args.host or "0.0.0.0", args.port, args.workers)
+    else:
+        # run uvicorn programmatically
+        uvicorn.run("backend.main:app", host=args.host or "127.0.0.1", port=args.port, reload=True)
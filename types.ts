@@ -21,7 +21,6 @@ export interface Invoice {
   amount: number;
   description: string;
   status: 'pending' | 'approved' | 'rejected' | 'paid' | 'financed';
-  qr_code?: string;
   due_date: string;
   created_at: string;
 }
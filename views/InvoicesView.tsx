@@ -7,8 +7,6 @@ import {
   Filter,
   Download,
   MoreVertical,
-  ChevronLeft,
-  ChevronRight,
   Plus,
   QrCode,
   X
@@ -23,20 +21,64 @@ const InvoicesView: React.FC<InvoicesViewProps> = ({ role }) => {
   const [invoices, setInvoices] = useState<Invoice[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [selectedQr, setSelectedQr] = useState<string | null>(null);
+  const [query, setQuery] = useState('');
+  // Cursor for the page after the loaded rows, from the API's X-Next-Cursor header
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+  const fetchPage = (q: string, cursor?: string) => {
+    const params = cursor ? { cursor } : {};
+    return q
+      ? client.get('/invoices/search', { params: { q, ...params } })
+      : client.get('/invoices/', { params });
+  };
 
   useEffect(() => {
+    const q = query.trim();
     const fetchInvoices = async () => {
       try {
-        const response = await client.get('/invoices/');
+        const response = await fetchPage(q);
         setInvoices(response.data);
+        setNextCursor(response.headers['x-next-cursor'] ?? null);
       } catch (error) {
         console.error("Failed to fetch invoices", error);
       } finally {
         setIsLoading(false);
       }
     };
-    fetchInvoices();
-  }, []);
+    // Wait for a pause in typing before searching
+    const timer = setTimeout(fetchInvoices, q ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  const loadMore = async () => {
+    if (!nextCursor || isLoadingMore) return;
+    setIsLoadingMore(true);
+    try {
+      const response = await fetchPage(query.trim(), nextCursor);
+      setInvoices((loaded) => [...loaded, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] ?? null);
+    } catch (error) {
+      console.error("Failed to load more invoices", error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  // QR images are rendered on demand by the API and cached by the browser
+  const showQr = async (invoiceId: string) => {
+    try {
+      const response = await client.get(`/invoices/${invoiceId}/qr`, { responseType: 'blob' });
+      setSelectedQr(URL.createObjectURL(response.data));
+    } catch (error) {
+      console.error("Failed to load QR code", error);
+    }
+  };
+
+  const closeQr = () => {
+    if (selectedQr) URL.revokeObjectURL(selectedQr);
+    setSelectedQr(null);
+  };
 
   return (
     <div className="space-y-8">
@@ -59,7 +101,9 @@ const InvoicesView: React.FC<InvoicesViewProps> = ({ role }) => {
             <Search className="absolute left-4 top-1/2 -translate-y-1/2 text-kaziflow-accent" size={18} />
             <input
               type="text"
-              placeholder="Search by ID or Partner"
+              placeholder="Search by description or partner"
+              value={query}
+              onChange={(e) => setQuery(e.target.value)}
               className="w-full pl-12 pr-4 py-3 bg-kaziflow-beige border-none rounded-2xl text-sm"
             />
           </div>
@@ -106,15 +150,13 @@ const InvoicesView: React.FC<InvoicesViewProps> = ({ role }) => {
                   <td className="px-6 py-4 font-bold text-sm">RWF {inv.amount.toLocaleString()}</td>
                   <td className="px-6 py-4 text-xs text-kaziflow-accent">{new Date(inv.due_date).toLocaleDateString()}</td>
                   <td className="px-6 py-4 text-right flex items-center justify-end gap-2">
-                    {inv.qr_code && (
-                      <button
-                        onClick={() => setSelectedQr(inv.qr_code)}
-                        className="p-2 hover:bg-kaziflow-beige rounded-lg text-kaziflow-blue"
-                        title="View QR Code"
-                      >
-                        <QrCode size={16} />
-                      </button>
-                    )}
+                    <button
+                      onClick={() => showQr(inv.id)}
+                      className="p-2 hover:bg-kaziflow-beige rounded-lg text-kaziflow-blue"
+                      title="View QR Code"
+                    >
+                      <QrCode size={16} />
+                    </button>
                     <button className="p-2 hover:bg-kaziflow-beige rounded-lg"><MoreVertical size={16} /></button>
                   </td>
                 </tr>
@@ -125,16 +167,18 @@ const InvoicesView: React.FC<InvoicesViewProps> = ({ role }) => {
 
         {/* Pagination */}
         <div className="p-4 border-t border-kaziflow-beigeDark flex items-center justify-between">
-          <p className="text-xs text-kaziflow-accent">Showing 1 to 4 of 142 results</p>
-          <div className="flex items-center gap-2">
-            <button className="p-2 bg-kaziflow-beige rounded-lg"><ChevronLeft size={16} /></button>
-            <div className="flex gap-1">
-              <button className="w-8 h-8 bg-kaziflow-blue text-white rounded-lg text-xs font-bold">1</button>
-              <button className="w-8 h-8 hover:bg-kaziflow-beige rounded-lg text-xs font-bold">2</button>
-              <button className="w-8 h-8 hover:bg-kaziflow-beige rounded-lg text-xs font-bold">3</button>
-            </div>
-            <button className="p-2 bg-kaziflow-beige rounded-lg"><ChevronRight size={16} /></button>
-          </div>
+          <p className="text-xs text-kaziflow-accent">
+            Showing {invoices.length} {invoices.length === 1 ? 'invoice' : 'invoices'}{nextCursor ? ' so far' : ''}
+          </p>
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={isLoadingMore}
+              className="px-4 py-2 bg-kaziflow-beige rounded-lg text-xs font-bold disabled:opacity-50"
+            >
+              {isLoadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       </div>
 
@@ -143,7 +187,7 @@ const InvoicesView: React.FC<InvoicesViewProps> = ({ role }) => {
         <div className="fixed inset-0 z-50 flex items-center justify-center p-4 bg-kaziflow-blue/80 backdrop-blur-sm">
           <div className="bg-white rounded-[2rem] p-8 w-full max-w-sm shadow-2xl relative text-center">
             <button
-              onClick={() => setSelectedQr(null)}
+              onClick={closeQr}
               className="absolute top-4 right-4 text-gray-400 hover:text-gray-600"
             >
               <X size={24} />
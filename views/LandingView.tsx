@@ -60,7 +60,7 @@ const LandingView: React.FC<LandingViewProps> = () => {
       if (email.includes('admin')) targetRole = UserRole.ADMIN;
       if (email.includes('retailer')) targetRole = UserRole.RETAILER;
 
-      login(response.data.access_token, targetRole);
+      login(response.data.access_token, targetRole, response.data.refresh_token);
     } catch (err: any) {
       console.error(err);
       console.error(err);